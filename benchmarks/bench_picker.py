@@ -0,0 +1,53 @@
+'''
+Times each keystroke of the teammate picker's search over a large roster,
+both narrowing as the user types and starting over from scratch.
+
+Usage: python benchmarks/bench_picker.py [roster_size]
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import constants  # noqa: E402
+from records import Teammate  # noqa: E402
+from utils import TeammateIndex  # noqa: E402
+
+FIRST_NAMES = ('Alice', 'Bob', 'Carla', 'Dan', 'Erin', 'Frank', 'Grace', 'Heidi')
+LAST_NAMES = ('Appleby', 'Lindqvist', 'Smith', 'Nakamura', 'Okafor', 'Walsh')
+
+
+def generate_team(size):
+    return [
+        Teammate(
+            id=f'id-{index:08d}',
+            name=f'{FIRST_NAMES[index % 8]} {LAST_NAMES[index % 6]}{index}',
+            nickname=f'{FIRST_NAMES[index % 8][:2].lower()}{index}' if index % 3 else None,
+        )
+        for index in range(size)
+    ]
+
+
+def main(size):
+    team = generate_team(size)
+
+    start = time.perf_counter()
+    index = TeammateIndex(team)
+    print(f'Roster of {size}')
+    print(f'  build index: {(time.perf_counter() - start) * 1000:.1f} ms')
+
+    query = 'carla lind'
+    for label, fresh in (('narrowing', False), ('from scratch', True)):
+        slowest = 0
+        for length in range(1, len(query) + 1):
+            if fresh:
+                index = TeammateIndex(team)
+            start = time.perf_counter()
+            index.search(query[:length], constants.PICKER_RESULTS)
+            slowest = max(slowest, time.perf_counter() - start)
+        print(f'  slowest keystroke, {label}: {slowest * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,64 @@
+'''
+Compares the memory used by a large roster held as plain dicts versus
+Teammate records, along with the cost of converting at the JSON boundary
+and of matching a name against the whole roster.
+
+Usage: python benchmarks/bench_records.py [roster_size]
+'''
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from records import Teammate  # noqa: E402
+from utils import match_name_to_teammates  # noqa: E402
+
+
+def generate_roster(size):
+    return [
+        {
+            'id': f'id-{index:08d}',
+            'name': f'Teammate Number{index}',
+            'firstName': 'Teammate',
+            'relationship': 'report',
+        }
+        for index in range(size)
+    ]
+
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main(size):
+    raw = generate_roster(size)
+
+    _, dict_bytes = measure(lambda: [dict(teammate) for teammate in raw])
+    records, record_bytes = measure(lambda: [Teammate.from_json(t) for t in raw])
+
+    print(f'Roster of {size}')
+    print(f'  dicts:   {dict_bytes / size:8.1f} bytes/teammate')
+    print(f'  records: {record_bytes / size:8.1f} bytes/teammate')
+
+    number = 5
+    from_json = timeit.timeit(
+        lambda: [Teammate.from_json(t) for t in raw], number=number
+    )
+    to_json = timeit.timeit(lambda: [t.to_json() for t in records], number=number)
+    print(f'  from_json: {from_json / number * 1000:.1f} ms')
+    print(f'  to_json:   {to_json / number * 1000:.1f} ms')
+
+    match = timeit.timeit(
+        lambda: match_name_to_teammates('nobody', records), number=number
+    )
+    print(f'  match miss over records: {match / number * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
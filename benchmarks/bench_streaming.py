@@ -0,0 +1,58 @@
+'''
+Compares peak memory of parsing a large meeting listing all at once (what
+response.json() does) versus streaming it with iter_json_array, keeping only
+one field per record like the cadence report does.
+
+Usage: python benchmarks/bench_streaming.py [meetings]
+'''
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import constants  # noqa: E402
+from client import iter_json_array  # noqa: E402
+
+
+def generate_body(size):
+    meeting = {
+        'id': 'abcdefghijklmnopqrstuv',
+        'calendarDate': '2020-01-01',
+        'isDraft': False,
+        'participants': [{'id': 'a' * 22, 'name': 'Alice Appleton'}] * 2,
+        'talkingPoints': [{'content': '<p>' + 'x' * 200 + '</p>'}] * 5,
+    }
+    return json.dumps([meeting] * size).encode()
+
+
+def chunks(body):
+    for start in range(0, len(body), constants.STREAM_CHUNK_SIZE):
+        yield body[start:start + constants.STREAM_CHUNK_SIZE]
+
+
+def peak(parse, body):
+    tracemalloc.start()
+    parse(body)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_bytes
+
+
+def main(size):
+    body = generate_body(size)
+    print(f'{size} meetings, {len(body) / 1e6:.1f} MB body')
+
+    buffered = peak(
+        lambda b: [m['calendarDate'] for m in json.loads(b.decode())], body
+    )
+    streamed = peak(
+        lambda b: [m['calendarDate'] for m in iter_json_array(chunks(b))], body
+    )
+    print(f'  response.json():  {buffered / 1e6:8.1f} MB peak')
+    print(f'  iter_json_array:  {streamed / 1e6:8.1f} MB peak')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
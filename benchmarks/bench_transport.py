@@ -0,0 +1,221 @@
+'''
+Fans out meeting lookups for a whole team through each SIClient transport
+against local stand-ins for SI, reporting latency, how many connections the
+server saw and the most requests it had in flight on one connection.
+
+http1 runs against an HTTP/1.1 stand-in. http2 runs against an HTTP/2 stand-in
+(built on h2, which comes with httpx[http2]) that it talks to with prior
+knowledge, since there's no TLS for ALPN to negotiate h2 over. To measure
+against a real server instead, pass --url (connection counts aren't available
+then).
+
+Usage: python benchmarks/bench_transport.py [--teammates 200] [--latency-ms 50]
+           [--url https://localhost:8443]
+'''
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import constants  # noqa: E402
+from client import SIClient  # noqa: E402
+from transports import HTTP2Transport, TRANSPORTS  # noqa: E402
+
+
+class Counters(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        # Most requests in flight at once on any one connection
+        self.max_in_flight = 0
+
+    def connected(self):
+        with self.lock:
+            self.connections += 1
+
+    def in_flight(self, count):
+        with self.lock:
+            self.max_in_flight = max(self.max_in_flight, count)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0
+    counters = None
+
+    def setup(self):
+        super().setup()
+        self.counters.connected()
+
+    def do_GET(self):
+        # HTTP/1.1 only ever has one request in flight per connection
+        self.counters.in_flight(1)
+        time.sleep(self.latency)
+        body = b'[]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http1_stand_in(latency, counters):
+    StandInHandler.latency = latency
+    StandInHandler.counters = counters
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def serve_http2_connection(sock, latency, counters):
+    import h2.config
+    import h2.connection
+    import h2.events
+
+    connection = h2.connection.H2Connection(
+        config=h2.config.H2Configuration(client_side=False, header_encoding='utf-8')
+    )
+    lock = threading.Lock()
+    in_flight = [0]
+
+    def send_pending():
+        data = connection.data_to_send()
+        if data:
+            sock.sendall(data)
+
+    def respond(stream_id):
+        with lock:
+            connection.send_headers(
+                stream_id,
+                [
+                    (':status', '200'),
+                    ('content-type', 'application/json'),
+                    ('content-length', '2'),
+                ],
+            )
+            connection.send_data(stream_id, b'[]', end_stream=True)
+            in_flight[0] -= 1
+            send_pending()
+
+    with lock:
+        connection.initiate_connection()
+        send_pending()
+
+    try:
+        while True:
+            data = sock.recv(65535)
+            if not data:
+                break
+            with lock:
+                events = connection.receive_data(data)
+                for event in events:
+                    if isinstance(event, h2.events.RequestReceived):
+                        # Requests on one connection are answered side by
+                        # side, each after the stand-in's latency
+                        in_flight[0] += 1
+                        counters.in_flight(in_flight[0])
+                        threading.Timer(latency, respond, (event.stream_id,)).start()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                send_pending()
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+def start_http2_stand_in(latency, counters):
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+
+    def accept():
+        while True:
+            try:
+                sock, _ = listener.accept()
+            except OSError:
+                return
+            counters.connected()
+            threading.Thread(
+                target=serve_http2_connection,
+                args=(sock, latency, counters),
+                daemon=True,
+            ).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener.close, f'http://127.0.0.1:{listener.getsockname()[1]}'
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def run(transport, base_url, teammates, prior_knowledge=False):
+    client = SIClient('fake_token', base_url=base_url, transport=transport)
+    if prior_knowledge:
+        client.transport = HTTP2Transport(
+            {'Authorization': 'Bearer fake_token', 'Accept': 'application/json'},
+            prior_knowledge=True,
+        )
+    timings = []
+
+    def lookup(teammate_id):
+        start = time.perf_counter()
+        client.get_meetings_with_teammate(teammate_id)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=constants.MAX_WORKERS) as executor:
+        list(executor.map(lookup, [f'teammate-{i}' for i in range(teammates)]))
+    return time.perf_counter() - start, timings
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--teammates', type=int, default=200)
+    parser.add_argument('--latency-ms', type=int, default=50)
+    parser.add_argument('--url')
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    stand_ins = {'http1': start_http1_stand_in, 'http2': start_http2_stand_in}
+    for transport in TRANSPORTS:
+        counters = Counters()
+        stop = None
+        base_url = args.url
+        if not base_url:
+            stop, base_url = stand_ins[transport](latency, counters)
+
+        total, timings = run(
+            transport,
+            base_url,
+            args.teammates,
+            prior_knowledge=transport == 'http2' and not args.url,
+        )
+        if stop:
+            stop()
+            connections = counters.connections
+            in_flight = counters.max_in_flight
+        else:
+            connections = in_flight = 'n/a'
+
+        print(
+            f'{transport}: {args.teammates} lookups in {total * 1000:.0f} ms, '
+            f'p50 {percentile(timings, 0.5) * 1000:.0f} ms, '
+            f'p95 {percentile(timings, 0.95) * 1000:.0f} ms, '
+            f'connections {connections}, most in flight on one connection {in_flight}'
+        )
+
+
+if __name__ == '__main__':
+    main()
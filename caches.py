@@ -1,12 +1,37 @@
 import json
 import os
+import tempfile
 
 
 class CacheException(Exception):
     pass
 
 
-class FileBackedCache(object):
+class BaseCache(object):
+    '''
+    The cache is split into a small header (me, manager, baseUrl, ...) and
+    shards for the bigger, less often needed pieces (the team roster, meetings).
+    Most commands only need the header, so they never have to parse the roster.
+    '''
+
+    SCHEMA_VERSION = 2
+    SHARDS = ('team', 'meetings')
+
+    def read_data(self):
+        data = self.read_header()
+        for shard in self.SHARDS:
+            data[shard] = self.read_shard(shard)
+        return data
+
+    def write_data(self, data):
+        data = dict(data)
+        # Shards go first, so the header never points at shards that don't exist yet
+        for shard in self.SHARDS:
+            self.write_shard(shard, data.pop(shard, {}))
+        self.write_header(data)
+
+
+class FileBackedCache(BaseCache):
 
     LOCAL_FILE_NAME = '.small-improvements-cache'
 
@@ -17,45 +42,97 @@ class FileBackedCache(object):
     def LOCAL_FILE(self):
         return os.environ['HOME'] + f'/{self.LOCAL_FILE_NAME}'
 
-    def read_data(self):
+    def shard_file(self, shard):
+        return f'{self.LOCAL_FILE}.{shard}'
+
+    def read_header(self):
+        header = self._read_json(self.LOCAL_FILE)
+        if 'schemaVersion' not in header:
+            header = self._migrate(header)
+        return header
+
+    def read_shard(self, shard):
+        if not os.path.isfile(self.shard_file(shard)):
+            # Reading the header makes sure we're setup and migrates an old,
+            # single file cache into shards
+            self.read_header()
+            if not os.path.isfile(self.shard_file(shard)):
+                return {}
+        return self._read_json(self.shard_file(shard))
+
+    def write_header(self, header):
+        self._write_json(
+            self.LOCAL_FILE, dict(header, schemaVersion=self.SCHEMA_VERSION)
+        )
+
+    def write_shard(self, shard, data):
+        self._write_json(self.shard_file(shard), data)
+
+    def _migrate(self, data):
+        # Caches written before sharding keep everything in one file
+        data = dict(data)
+        self.write_data(data)
+        for shard in self.SHARDS:
+            data.pop(shard, None)
+        data['schemaVersion'] = self.SCHEMA_VERSION
+        return data
+
+    def _read_json(self, path):
         try:
-            with open(self.LOCAL_FILE, 'rb') as data_file:
+            with open(path, 'rb') as data_file:
                 return json.loads(data_file.read())
         except IOError:
             raise CacheException(
-                'Could not find {}. You should run setup first.'.format(self.LOCAL_FILE)
+                'Could not find {}. You should run setup first.'.format(path)
             )
         except json.decoder.JSONDecodeError:
             raise CacheException(
                 'File {} was not valid JSON. You should re-run setup to fix.'.format(
-                    self.LOCAL_FILE
+                    path
                 )
             )
         except Exception:
             raise CacheException(
-                'Cound not read {}. You should re-run setup to fix.'.format(
-                    self.LOCAL_FILE
-                )
+                'Cound not read {}. You should re-run setup to fix.'.format(path)
             )
 
-    def write_data(self, data):
+    def _write_json(self, path, data):
+        # Written to the side then swapped in, so a reader (e.g. while a
+        # background sync runs) never sees a half written file
         try:
-            with open(self.LOCAL_FILE, 'w') as data_file:
+            fd, temp_path = tempfile.mkstemp(
+                dir=os.path.dirname(path), prefix=os.path.basename(path) + '.'
+            )
+            with os.fdopen(fd, 'w') as data_file:
                 data = json.dumps(data, sort_keys=True, indent=4)
                 data_file.write(data)
+            os.replace(temp_path, path)
         except IOError:
-            raise CacheException('Could not write {}'.format(self.LOCAL_FILE))
+            raise CacheException('Could not write {}'.format(path))
+
 
+class MemoryBackedCache(BaseCache):
+    # Stored as JSON so callers get fresh copies, just like reading a file
 
-class MemoryBackedCache(object):
     def is_setup(self):
-        return bool(getattr(self, '_cache', {}))
+        return 'header' in getattr(self, '_cache', {})
 
-    def read_data(self):
-        data = getattr(self, '_cache', {})
-        if not data:
+    def read_header(self):
+        if not self.is_setup():
             raise CacheException('No data found')
-        return data
+        return json.loads(self._cache['header'])
 
-    def write_data(self, data):
-        self._cache = data
+    def read_shard(self, shard):
+        self.read_header()
+        return json.loads(self._cache.get(shard, '{}'))
+
+    def write_header(self, header):
+        self._store('header', dict(header, schemaVersion=self.SCHEMA_VERSION))
+
+    def write_shard(self, shard, data):
+        self._store(shard, data)
+
+    def _store(self, key, data):
+        if not hasattr(self, '_cache'):
+            self._cache = {}
+        self._cache[key] = json.dumps(data)
@@ -1,39 +1,266 @@
+import codecs
 import json
+import os
+import threading
+import time
+from concurrent.futures import Future
 
 import click
 import requests
 
 import constants
+from metrics import endpoint_name
+from transports import get_transport
+
+
+def iter_json_array(chunks):
+    '''
+    Parses a JSON array from an iterable of byte chunks, yielding each element
+    as soon as it is complete. Only the element being parsed is held in memory,
+    not the whole response
+    '''
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+    position = 0
+    finished = False
+    started = False
+
+    def read_more():
+        nonlocal buffer, position, finished
+        chunk = next(chunks, None)
+        if chunk is None:
+            finished = True
+            buffer = buffer[position:] + text_decoder.decode(b'', final=True)
+        else:
+            buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+
+    expecting_element = True
+    after_comma = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n':
+            position += 1
+
+        if position == len(buffer):
+            if finished:
+                raise ValueError('JSON array ended early')
+            read_more()
+            continue
+
+        char = buffer[position]
+        if not started:
+            if char != '[':
+                raise ValueError('Expected a JSON array')
+            started = True
+            position += 1
+            continue
+
+        if char == ']':
+            if after_comma:
+                raise ValueError(f'Trailing comma before position {position}')
+            return
+
+        if not expecting_element:
+            if char != ',':
+                raise ValueError(f'Expected , or ] at position {position}')
+            expecting_element = after_comma = True
+            position += 1
+            continue
+
+        try:
+            element, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as e:
+            # Only worth reading on if the element was cut off by the end of
+            # the buffer, otherwise it is broken and reading on would just
+            # buffer the rest of the response
+            if finished or not _is_cut_off(e, buffer):
+                raise
+            read_more()
+            continue
+
+        if not finished and (end == len(buffer) or buffer[end] not in ' \t\r\n,]'):
+            # A number cut off by the end of the buffer (ex. `4.` of `4.5`) still
+            # parses, so wait until we can see what follows it
+            read_more()
+            continue
+
+        position = end
+        expecting_element = after_comma = False
+        yield element
+
+
+JSON_LITERALS = ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity')
+NUMBER_CHARS = '0123456789+-.eE'
+
+
+def _is_cut_off(error, buffer):
+    if error.pos >= len(buffer) - 1 or error.msg.startswith('Unterminated string'):
+        return True
+    if not buffer[error.pos:].strip(NUMBER_CHARS):
+        # The rest of a number nested in the element (ex. `e-` of `4.5e-3`), the
+        # decoder stops at the first character a number can't have yet
+        return True
+    if error.msg.startswith('Invalid \\uXXXX escape'):
+        return len(buffer) - error.pos < 6
+    if error.msg == 'Expecting value':
+        # A literal or the `-` of a number split across chunks
+        rest = buffer[error.pos:]
+        return any(literal.startswith(rest) for literal in JSON_LITERALS)
+    return False
+
+
+def iter_json_chunks(data, field, chunks):
+    '''
+    Encodes a JSON object a piece at a time, for uploading without building the
+    whole body. The string value of `field` comes from chunks, everything else
+    from data. Pieces are batched up to STREAM_CHUNK_SIZE bytes
+    '''
+    prefix = json.dumps(data)[:-1]
+    if data:
+        prefix += ', '
+    pieces = [f'{prefix}{json.dumps(field)}: "']
+    size = len(pieces[0])
+    for chunk in chunks:
+        # Escaped the same as a whole string would be, minus the quotes
+        escaped = json.dumps(chunk)[1:-1]
+        pieces.append(escaped)
+        size += len(escaped)
+        if size >= constants.STREAM_CHUNK_SIZE:
+            yield ''.join(pieces).encode('utf-8')
+            pieces = []
+            size = 0
+    pieces.append('"}')
+    yield ''.join(pieces).encode('utf-8')
+
+
+class DeadlineExceeded(requests.Timeout):
+    pass
+
+
+class Deadline(object):
+    '''
+    A time budget shared by every request in a command. Each request gets
+    whatever is left of it as its timeout
+    '''
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+    def timeout(self):
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f'Ran out of time after {self.seconds:g}s')
+        connect_timeout, read_timeout = constants.DEFAULT_TIMEOUT
+        return (min(connect_timeout, remaining), min(read_timeout, remaining))
+
+
+class CircuitOpenError(requests.ConnectionError):
+    pass
+
+
+class CircuitBreaker(object):
+    '''
+    Stops us hammering SI while it is down. After BREAKER_FAILURE_THRESHOLD
+    failures in a row, requests fail straight away for BREAKER_COOLDOWN_SECONDS.
+    After that, requests are let through again and the first success closes
+    the breaker. State is kept in a file so separate invocations (ex. a
+    scripted batch) share it
+    '''
+
+    LOCAL_FILE_NAME = '.small-improvements-breaker'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    @property
+    def LOCAL_FILE(self):
+        return os.environ['HOME'] + f'/{self.LOCAL_FILE_NAME}'
+
+    @property
+    def state(self):
+        if self._state is None:
+            try:
+                with open(self.LOCAL_FILE, 'rb') as state_file:
+                    self._state = json.loads(state_file.read())
+            except (IOError, ValueError):
+                self._state = {}
+        return self._state
+
+    def open_until(self):
+        open_until = self.state.get('openUntil', 0)
+        return open_until if open_until > time.time() else None
+
+    def before_request(self):
+        open_until = self.open_until()
+        if open_until:
+            until = time.strftime('%H:%M:%S', time.localtime(open_until))
+            raise CircuitOpenError(
+                f'Small Improvements looks to be down, not trying again until {until}'
+            )
+
+    def record_success(self):
+        with self._lock:
+            if self.state:
+                self._state = {}
+                self._save()
+
+    def record_failure(self):
+        with self._lock:
+            failures = self.state.get('failures', 0) + 1
+            self._state = {'failures': failures}
+            if failures >= constants.BREAKER_FAILURE_THRESHOLD:
+                self._state['openUntil'] = time.time() + constants.BREAKER_COOLDOWN_SECONDS
+            self._save()
+
+    def _save(self):
+        try:
+            with open(self.LOCAL_FILE, 'w') as state_file:
+                state_file.write(json.dumps(self._state))
+        except IOError:
+            pass
 
 
 class SIClient(object):
 
     BASE_URL = None
     API_URL = None
+    deadline = None
+    metrics = None
+    breaker = None
 
-    def __init__(self, token, base_url=None):
-        self.session = requests.Session()
-        self.session.headers.update(
-            {'Authorization': f'Bearer {token}', 'Accept': 'application/json'}
+    def __init__(self, token, base_url=None, transport=None):
+        self.transport = get_transport(
+            transport,
+            {'Authorization': f'Bearer {token}', 'Accept': 'application/json'},
         )
-        self.session.hooks['response'].append(self._check_for_401)
         self.set_base_url(base_url)
+        self._gets = {}
+        self._gets_lock = threading.Lock()
 
     def get_me(self):
-        response = self.session.get(f'{self.API_URL}/users/me')
-        response.raise_for_status()
-        return response.json()
+        return self._get(f'{self.API_URL}/users/me')
 
     def get_team(self, manager_id):
-        team_response = self.session.get(
-            f'{self.API_URL}/users/medium', params={'managerId': manager_id}
-        )
-        team_response.raise_for_status()
-        return team_response.json()
+        return self._get(f'{self.API_URL}/users/medium', params={'managerId': manager_id})
+
+    def iter_team(self, manager_id):
+        '''
+        Like get_team, but yields teammates as they arrive instead of loading
+        the whole response
+        '''
+        return self._iter(f'{self.API_URL}/users/medium', params={'managerId': manager_id})
 
     def create_meeting(self, owner_id, teammate_id, meeting_date, status='SHARED'):
         is_draft = False if status == 'SHARED' else True
-        response = self.session.post(
+        response = self._request(
+            'POST',
             f'{self.API_URL}/meetings',
             headers={'Content-Type': 'application/json;charset=UTF-8'},
             data=json.dumps(
@@ -45,27 +272,34 @@ class SIClient(object):
             ),
         )
         response.raise_for_status()
+        self._invalidate(f'{self.API_URL}/meetings')
         return response.json()
 
     def get_meetings_with_teammate(self, teammate_id, start_date=None, end_date=None):
-        params = {'participants': teammate_id}
-        if start_date:
-            params['startDate'] = self._format_date(start_date)
-        if end_date:
-            params['endDate'] = self._format_date(end_date)
-        response = self.session.get(
-            f'{self.API_URL}/meetings', params=params
+        return self._get(
+            f'{self.API_URL}/meetings',
+            params=self._meeting_params(teammate_id, start_date, end_date),
+        )
+
+    def iter_meetings_with_teammate(self, teammate_id, start_date=None, end_date=None):
+        '''
+        Like get_meetings_with_teammate, but yields meetings as they arrive.
+        Stopping early (or closing the generator) closes the connection
+        '''
+        return self._iter(
+            f'{self.API_URL}/meetings',
+            params=self._meeting_params(teammate_id, start_date, end_date),
         )
-        response.raise_for_status()
-        return response.json()
 
     def share_meeting(self, meeting_id):
-        response = self.session.patch(
+        response = self._request(
+            'PATCH',
             f"{self.API_URL}/meetings/{meeting_id}",
             headers={'Content-Type': 'application/json;charset=UTF-8'},
             data=json.dumps({'status': 'SHARED'}),
         )
         response.raise_for_status()
+        self._invalidate(f'{self.API_URL}/meetings')
 
     def add_talking_point(self, meeting_id, content, visibility='SHARED'):
         talking_point = {
@@ -74,27 +308,139 @@ class SIClient(object):
             'visibility': visibility,
         }
 
-        response = self.session.post(
+        response = self._request(
+            'POST',
             f'{self.API_URL}/meetings/{meeting_id}/talkingpoints',
             headers={'Content-Type': 'application/json;charset=UTF-8'},
             data=json.dumps([talking_point]),
         )
         response.raise_for_status()
+        self._invalidate(f'{self.API_URL}/meetings/{meeting_id}')
 
     def add_note(self, meeting_id, content, visibility='SHARED'):
-        note = {'meetingId': meeting_id, 'content': content, 'visibility': visibility}
+        '''
+        content can be a string, or an iterable of strings to stream up without
+        holding the whole note in memory
+        '''
+        note = {'meetingId': meeting_id, 'visibility': visibility}
+        if isinstance(content, str):
+            data = json.dumps(dict(note, content=content))
+        else:
+            data = iter_json_chunks(note, 'content', content)
 
-        response = self.session.post(
+        response = self._request(
+            'POST',
             f'{self.API_URL}/meetings/{meeting_id}/notes',
             headers={'Content-Type': 'application/json;charset=UTF-8'},
-            data=json.dumps(note),
+            data=data,
         )
         response.raise_for_status()
+        self._invalidate(f'{self.API_URL}/meetings/{meeting_id}')
 
     def set_base_url(self, base_url=None):
         self.BASE_URL = base_url or constants.DEFAULT_BASE_URL
         self.API_URL = self.BASE_URL + '/api/v2'
 
+    def clear_cache(self):
+        '''
+        Forgets remembered GETs, so the next ones go to SI. Requests in flight
+        still finish for whoever is waiting on them
+        '''
+        with self._gets_lock:
+            self._gets.clear()
+
+    def _get(self, url, params=None):
+        '''
+        GETs are remembered until clear_cache (SmallImprovements clears it at
+        the start of each bulk call), and callers asking for the same thing at
+        the same time share a single request. The parsed JSON is shared too, so
+        callers shouldn't modify it
+        '''
+        key = (url, tuple(sorted((params or {}).items())))
+        with self._gets_lock:
+            future = self._gets.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = self._gets[key] = Future()
+
+        if is_owner:
+            try:
+                response = self._request('GET', url, params=params)
+                response.raise_for_status()
+                future.set_result(response.json())
+            except BaseException as e:
+                # Don't remember failures, the next caller should get to retry
+                with self._gets_lock:
+                    if self._gets.get(key) is future:
+                        del self._gets[key]
+                future.set_exception(e)
+                raise
+
+        return future.result()
+
+    def _iter(self, url, params=None):
+        '''
+        Streams a JSON array response, yielding one record at a time. Unlike
+        _get, nothing is remembered, since that would mean holding it all
+        '''
+        response = self._request('GET', url, params=params, stream=True)
+        try:
+            response.raise_for_status()
+            yield from iter_json_array(
+                response.iter_content(chunk_size=constants.STREAM_CHUNK_SIZE)
+            )
+        finally:
+            response.close()
+
+    def _meeting_params(self, teammate_id, start_date, end_date):
+        params = {'participants': teammate_id}
+        if start_date:
+            params['startDate'] = self._format_date(start_date)
+        if end_date:
+            params['endDate'] = self._format_date(end_date)
+        return params
+
+    def _request(self, method, url, **kwargs):
+        if self.deadline:
+            kwargs['timeout'] = self.deadline.timeout()
+        else:
+            kwargs['timeout'] = constants.DEFAULT_TIMEOUT
+
+        if self.breaker:
+            self.breaker.before_request()
+
+        # A timeout cut short by our own deadline says nothing about SI
+        budget_limited = kwargs['timeout'] != constants.DEFAULT_TIMEOUT
+
+        start = time.perf_counter()
+        try:
+            response = self.transport.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if self.breaker and not (
+                budget_limited and isinstance(e, requests.Timeout)
+            ):
+                self.breaker.record_failure()
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.observe(
+                    'endpoint', endpoint_name(method, url), time.perf_counter() - start
+                )
+
+        if self.breaker:
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+        self._check_for_401(response)
+        return response
+
+    def _invalidate(self, url_prefix):
+        with self._gets_lock:
+            for key in [key for key in self._gets if key[0].startswith(url_prefix)]:
+                del self._gets[key]
+
     def _check_for_401(self, response, **kwargs):
         if response.status_code == 401:
             click.echo(f'Invalid SI_TOKEN. Please visit {self.BASE_URL}/app/personal-access-tokens to generate a token. Then run `export SI_TOKEN=<your_token>`')
@@ -1,12 +1,33 @@
+import csv
+import itertools
+import json
 import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import time
 
 import click
+import requests
 
 import constants
+from client import CircuitBreaker, CircuitOpenError, Deadline
+from metrics import (
+    BUCKETS,
+    FileBackedMetricsStore,
+    Recorder,
+    estimate_duration,
+    percentile,
+    to_openmetrics,
+)
 from small_improvements import SmallImprovements
-from utils import match_choices_to_teammates
+from utils import TeammateIndex, match_choices_to_teammates, parse_duration
 
 si = SmallImprovements(os.environ.get('SI_TOKEN'))
+metrics_store = FileBackedMetricsStore()
+si.client.metrics = Recorder(metrics_store)
+si.client.breaker = CircuitBreaker()
 
 COMMAND_ALIASES = {'an': 'add-note', 'ap': 'add-talking-point', 'sm': 'share-meeting'}
 
@@ -14,12 +35,31 @@ COMMAND_ALIASES = {'an': 'add-note', 'ap': 'add-talking-point', 'sm': 'share-mee
 class AliasedGroup(click.Group):
     def get_command(self, ctx, cmd_name):
         rv = click.Group.get_command(self, ctx, cmd_name)
-        if rv is not None:
-            return rv
-
-        if cmd_name in COMMAND_ALIASES:
-            return click.Group.get_command(self, ctx, COMMAND_ALIASES[cmd_name])
-        ctx.fail(f'Unknown Command: {cmd_name}')
+        if rv is None and cmd_name in COMMAND_ALIASES:
+            rv = click.Group.get_command(self, ctx, COMMAND_ALIASES[cmd_name])
+        if rv is None:
+            ctx.fail(f'Unknown Command: {cmd_name}')
+
+        ctx.meta['command_name'] = rv.name
+        return rv
+
+    def invoke(self, ctx):
+        start = time.perf_counter()
+        try:
+            return click.Group.invoke(self, ctx)
+        except CircuitOpenError as e:
+            raise click.ClickException(
+                f'{e}. Commands that work from the cache, like list-team, still work'
+            )
+        except requests.RequestException as e:
+            raise click.ClickException(f'Request to Small Improvements failed: {e}')
+        finally:
+            recorder = si.client.metrics
+            if recorder and 'command_name' in ctx.meta:
+                recorder.observe(
+                    'command', ctx.meta['command_name'], time.perf_counter() - start
+                )
+                recorder.flush()
 
 
 def prompt_teammate_selection(message, team):
@@ -27,6 +67,9 @@ def prompt_teammate_selection(message, team):
         # Only one option, default to it (likely manager)
         return [team[0]], []
 
+    if len(team) > constants.PICKER_MIN_TEAM_SIZE and sys.stdin.isatty() and sys.stdout.isatty():
+        return pick_teammates(message, team)
+
     click.echo(message)
     print_team(team)
     selection = click.prompt('Selection (ex. `alice`, `1,2,5`, `team`, `1,2,alice`)')
@@ -34,8 +77,99 @@ def prompt_teammate_selection(message, team):
     return match_choices_to_teammates(selection, team)
 
 
+PICKER_KEYS = {
+    '\r': 'done',
+    '\n': 'done',
+    '\t': 'toggle',
+    '\x01': 'toggle_all',
+    '\x1b[A': 'up',
+    '\x1b[B': 'down',
+    '\x7f': 'backspace',
+    '\x08': 'backspace',
+    '\x03': 'abort',
+    '\x1b': 'abort',
+}
+
+
+def pick_teammates(message, team):
+    '''
+    Filters the team as you type. Up/down move, tab picks (or unpicks) the
+    highlighted teammate, ctrl-a picks (or unpicks) everybody matching the search
+    and enter finishes, picking the highlighted teammate if nobody else was.
+    Typing `all`, `team` or `manager` and hitting enter picks them, like the
+    numbered prompt
+    '''
+    index = TeammateIndex(team)
+    query = ''
+    matches = index.search(query, constants.PICKER_RESULTS)
+    highlighted = 0
+    # By id, records compare field by field which is slow across a big team
+    picked = {}
+    drawn = 0
+
+    click.echo(message)
+    while True:
+        lines = [f'Search: {query}']
+        if picked:
+            names = [t.nickname or t.name for t in itertools.islice(picked.values(), 5)]
+            if len(picked) > len(names):
+                names.append(f'and {len(picked) - len(names)} more')
+            lines.append('Picked: ' + ', '.join(names))
+        for position, teammate in enumerate(matches):
+            pointer = '>' if position == highlighted else ' '
+            tick = '*' if teammate.id in picked else ' '
+            nickname = f' ({teammate.nickname})' if teammate.nickname else ''
+            lines.append(f'{pointer}{tick} {teammate.name}{nickname}')
+        if not matches:
+            lines.append('  No matches')
+        if not picked and query.lower() in ('all', 'team', 'manager'):
+            lines.append(f'  Enter picks {query.lower()}')
+
+        # Redraw in place: back up over what we drew last time and clear it
+        if drawn:
+            click.echo(f'\x1b[{drawn}F\x1b[J', nl=False)
+        click.echo('\n'.join(lines))
+        drawn = len(lines)
+
+        key = click.getchar()
+        action = PICKER_KEYS.get(key)
+        if action == 'abort':
+            raise click.Abort()
+        elif action == 'done':
+            if not picked and query.lower() in ('all', 'team', 'manager'):
+                keyword_picks, _ = match_choices_to_teammates(query, team)
+                if keyword_picks:
+                    return keyword_picks, []
+            if not picked and matches:
+                picked[matches[highlighted].id] = matches[highlighted]
+            if picked:
+                return list(picked.values()), []
+        elif action == 'toggle' and matches:
+            teammate = matches[highlighted]
+            if teammate.id in picked:
+                del picked[teammate.id]
+            else:
+                picked[teammate.id] = teammate
+        elif action == 'toggle_all':
+            everybody = index.search(query)
+            if all(teammate.id in picked for teammate in everybody):
+                for teammate in everybody:
+                    del picked[teammate.id]
+            else:
+                for teammate in everybody:
+                    picked.setdefault(teammate.id, teammate)
+        elif action == 'up':
+            highlighted = max(highlighted - 1, 0)
+        elif action == 'down':
+            highlighted = min(highlighted + 1, max(len(matches) - 1, 0))
+        elif action == 'backspace' or (action is None and key.isprintable()):
+            query = query[:-1] if action == 'backspace' else query + key
+            matches = index.search(query, constants.PICKER_RESULTS)
+            highlighted = 0
+
+
 def confirm_teammate_selection(prefix, found_teammates):
-    found_names = map(lambda x: x.get('nickname') or x['firstName'], found_teammates)
+    found_names = map(lambda x: x.nickname or x.firstName, found_teammates)
     click.confirm(
         f'{prefix} {", ".join(found_names)}',
         default=True,
@@ -63,19 +197,157 @@ def process_or_prompt_teammate_selection(desired_teammates, team, prompt):
     return found_teammates
 
 
+def prefetch_upcoming_meetings(desired_teammates, team):
+    '''
+    Starts looking up upcoming meetings in the background for whoever is likely
+    to be picked, so the work is done by the time the user confirms. That's
+    anybody named with -t, otherwise the whole team if it is small enough
+    '''
+    if desired_teammates:
+        candidates, _ = match_choices_to_teammates(list(desired_teammates), team)
+    elif len(team) <= constants.PREFETCH_TEAM_LIMIT:
+        candidates = team
+    else:
+        candidates = []
+
+    return si.find_upcoming_meetings(teammate.id for teammate in candidates)
+
+
+def cancel_prefetch(upcoming_meetings):
+    # Anything still queued is for somebody that wasn't picked
+    for future in upcoming_meetings.values():
+        future.cancel()
+
+
+def wait_for_results(results, teammates):
+    '''
+    Waits on the futures from a bulk call. Teammates that run out of time are
+    reported at the end, rather than failing everybody else. The meetings used
+    are remembered for when SI can't be reached
+    '''
+    names = {teammate.id: teammate.nickname or teammate.firstName for teammate in teammates}
+    timed_out = []
+    meetings = {}
+    try:
+        for teammate_id, futures in results.items():
+            try:
+                for future in futures:
+                    meetings[teammate_id] = future.result()
+            except requests.Timeout:
+                timed_out.append(names[teammate_id])
+    finally:
+        si.remember_meetings(meetings)
+
+    if timed_out:
+        raise click.ClickException(
+            f'Ran out of time before finishing with {", ".join(timed_out)}'
+        )
+
+
+def set_deadline(ctx, param, value):
+    if value is None:
+        return
+
+    try:
+        seconds = parse_duration(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    si.client.deadline = Deadline(seconds)
+
+
+deadline_option = click.option(
+    '--deadline',
+    callback=set_deadline,
+    expose_value=False,
+    help='Stop making requests after this long (ex. `10s`, `2m`). Counts from '
+    'when the command starts, so includes time spent at prompts',
+)
+
+
+plan_option = click.option(
+    '--plan',
+    is_flag=True,
+    default=False,
+    help='Show the requests this would make and how long they should take, '
+    'without making them',
+)
+
+
+def print_plan(action, teammates):
+    '''
+    Prints the requests a bulk command would make for each teammate, with a
+    time estimate from the endpoint timings in `stats`
+    '''
+    # A plan isn't a real run, so keep it out of the command timings
+    click.get_current_context().meta.pop('command_name', None)
+
+    if not teammates:
+        click.echo('Nobody to plan for')
+        return
+
+    plans = si.plan_requests((teammate.id for teammate in teammates), action)
+    width = max(
+        len(request['endpoint'])
+        for plan in plans.values()
+        for request in plan['requests']
+    )
+    least = most = expected = 0
+    chains = []
+    for teammate in teammates:
+        plan = plans[teammate.id]
+        meeting = plan['meeting']
+        if meeting:
+            click.echo(f'{teammate.name} (upcoming 1:1 on {meeting.calendarDate} in the cache)')
+        else:
+            click.echo(f'{teammate.name} (no upcoming 1:1 in the cache)')
+
+        chain = []
+        for request in plan['requests']:
+            maybe = ', if needed' if request['conditional'] else ''
+            click.echo(f'  {request["endpoint"]:<{width}}  {request["reason"]}{maybe}')
+            least += not request['conditional']
+            most += 1
+            if request['expected']:
+                expected += 1
+                chain.append(request['endpoint'])
+        chains.append(chain)
+
+    click.echo(f'\nRequests: {expected} expected ({least} to {most})')
+
+    seconds, unknown = estimate_duration(
+        chains, metrics_store.summarize(), constants.MAX_WORKERS
+    )
+    click.echo(
+        f'Estimated time: {seconds:.1f}s with {constants.MAX_WORKERS} requests at a time'
+    )
+    if unknown:
+        click.echo(f'No timings recorded yet for {", ".join(unknown)}, so not counted')
+
+
+def spool_stdin():
+    '''
+    Copies stdin to a temporary file a chunk at a time, so each teammate's
+    upload can read the note from the start. Returns the file's path
+    '''
+    with tempfile.NamedTemporaryFile('wb', suffix='.note', delete=False) as spool:
+        shutil.copyfileobj(sys.stdin.buffer, spool, constants.STREAM_CHUNK_SIZE)
+    return spool.name
+
+
 def print_team(team):
     if not team:
         raise click.BadParameter(f'Could not load team')
 
-    is_manager_first = team[0]['relationship'] == 'manager'
+    is_manager_first = team[0].relationship == 'manager'
     for index, teammate in enumerate(team):
         if index == 0:
             if is_manager_first:
                 click.echo(f'=== Manager ===')
             else:
                 click.echo(f'=== Team ===')
-        nickname = f"({teammate['nickname']})" if teammate.get('nickname') else ''
-        click.echo(f"{index + 1}. {teammate['name']} {nickname}")
+        nickname = f"({teammate.nickname})" if teammate.nickname else ''
+        click.echo(f"{index + 1}. {teammate.name} {nickname}")
         if index == 0 and is_manager_first and len(team) > 1:
             click.echo(f'\n=== Team ===')
 
@@ -114,6 +386,7 @@ def list_team():
 
 
 @cli.command(name='sync-team')
+@deadline_option
 def sync_team():
     '''
     Re-syncs your team from SI, adding any new teammates that are found.
@@ -144,6 +417,78 @@ def add_nickname():
     si.add_nickname(found_teammates[0], nickname)
 
 
+@cli.command(name='set-cadence')
+@click.argument('cadence', type=click.Choice(list(constants.CADENCES) + ['none']))
+def set_cadence(cadence):
+    '''
+    Sets how often you meet with a teammate. Used when creating meetings and in
+    the cadence report. `none` goes back to the default of weekly
+    '''
+
+    team = si.get_manager_and_team()
+    found_teammates, missing_teammates = prompt_teammate_selection(
+        'Whose cadence do you want to set?', team
+    )
+
+    if missing_teammates:
+        raise click.BadParameter(
+            f'"{", ".join(missing_teammates)}" did not match anybody on your team'
+        )
+
+    confirm_teammate_selection(f'Set cadence to {cadence} for', found_teammates)
+
+    for teammate in found_teammates:
+        si.set_cadence(teammate, None if cadence == 'none' else cadence)
+
+
+@cli.group(name='roster')
+def roster():
+    '''
+    Edit nicknames, hidden teammates and cadences for your whole team as a CSV
+    '''
+
+
+@roster.command(name='export')
+@click.argument('output', type=click.File('w'), default='-')
+def roster_export(output):
+    '''
+    Writes your team as CSV (id, name, nickname, hidden, cadence), to stdout
+    unless a file is given
+    '''
+    writer = csv.DictWriter(output, fieldnames=constants.ROSTER_COLUMNS)
+    writer.writeheader()
+    writer.writerows(si.export_roster())
+
+
+@roster.command(name='import')
+# utf-8-sig drops the byte order mark Excel puts at the start of "CSV UTF-8"
+@click.argument('roster_file', type=click.File('r', encoding='utf-8-sig'), default='-')
+def roster_import(roster_file):
+    '''
+    Applies a CSV like the one from `roster export`. Rows are matched by id and
+    any column can be left out. Hidden teammates don't show up when picking
+    who to add to
+
+    Example:
+
+    small-improvements roster export team.csv
+
+    small-improvements roster import team.csv
+    '''
+    reader = csv.DictReader(roster_file)
+    if 'id' not in (reader.fieldnames or []):
+        raise click.BadParameter('The first line needs the column names, including id')
+
+    try:
+        updated, unknown_ids = si.import_roster(reader)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    for teammate_id in unknown_ids:
+        click.echo(f'Skipped {teammate_id or "a row with no id"}, not on your team', err=True)
+    click.echo(f'Updated {updated} teammates')
+
+
 @cli.command(name='add-talking-point')
 @click.option('is_private', '--private', '-p', is_flag=True, default=False)
 @click.option(
@@ -155,15 +500,18 @@ def add_nickname():
     help='When creating a meeting, should it default to draft?',
 )
 @click.option('desired_teammates', '--teammate', '-t', multiple=True)
+@deadline_option
+@plan_option
 @click.argument('content', nargs=-1)
 def add_talking_point(
-    content, desired_teammates, is_draft_meeting, **talking_point_options
+    content, desired_teammates, is_draft_meeting, plan, **talking_point_options
 ):
     '''
     (Alias ap) Adds a talking point to one or more meetings. If there is not
     an upcoming meeting with a teammate, one will be created. Any meetings
-    created default to 7 days since last meeting (or tomorrow if there are no
-    past meetings)
+    created default to one cadence (7 days, unless set with set-cadence) since
+    the last meeting, or tomorrow if there are no past meetings. Weekends and
+    holidays in ~/.small-improvements-holidays are skipped
 
     Examples:
 
@@ -181,53 +529,86 @@ def add_talking_point(
 
     # Add a talking point to meetings with Alice and Bob
     small-improvements ap -t Alice -t Bob New Review Process
+
+    # See what adding a talking point for the whole team would take
+    small-improvements ap --plan -t team
     '''
 
-    if content:
-        content = ' '.join(content)
-        click.echo(f'Talking Point: {content}')
-    else:
-        content = click.prompt('Talking Point')
+    # Planning shouldn't make requests, so it doesn't refresh a stale roster
+    team = si.get_manager_and_team(refresh=not plan)
+    if plan:
+        print_plan(
+            'add-talking-point',
+            process_or_prompt_teammate_selection(
+                desired_teammates, team, 'Who do you want to add the talking point to?'
+            ),
+        )
+        return
 
-    team = si.get_manager_and_team()
+    upcoming_meetings = prefetch_upcoming_meetings(desired_teammates, team)
 
-    chosen_teammates = process_or_prompt_teammate_selection(
-        desired_teammates, team, 'Who do you want to add the talking point to?'
-    )
+    try:
+        if content:
+            content = ' '.join(content)
+            click.echo(f'Talking Point: {content}')
+        else:
+            content = click.prompt('Talking Point')
+
+        chosen_teammates = process_or_prompt_teammate_selection(
+            desired_teammates, team, 'Who do you want to add the talking point to?'
+        )
 
-    confirm_teammate_selection('Add this talking point to', chosen_teammates)
+        confirm_teammate_selection('Add this talking point to', chosen_teammates)
 
-    for teammate in chosen_teammates:
-        meeting = si.find_or_create_meeting(teammate['id'], is_draft=is_draft_meeting)
-        si.add_talking_point(
-            meeting['id'], content, talking_point_options=talking_point_options
+        wait_for_results(
+            si.add_talking_points(
+                {teammate.id: [content] for teammate in chosen_teammates},
+                talking_point_options=talking_point_options,
+                is_draft=is_draft_meeting,
+                upcoming_meetings=upcoming_meetings,
+            ),
+            chosen_teammates,
         )
+    finally:
+        cancel_prefetch(upcoming_meetings)
 
 
 @cli.command(name='share-meeting')
 @click.option('desired_teammates', '--teammate', '-t', multiple=True)
-def share_meeting(desired_teammates):
+@deadline_option
+@plan_option
+def share_meeting(desired_teammates, plan):
     '''
     (Alias sm) Shares the upcoming meeting with a teammate (so they can see the talking points)
     '''
 
-    team = si.get_manager_and_team()
+    team = si.get_manager_and_team(refresh=not plan)
 
     chosen_teammates = process_or_prompt_teammate_selection(
         desired_teammates, team, 'Who do you want to share the meeting with?'
     )
+    if plan:
+        print_plan('share-meeting', chosen_teammates)
+        return
 
     confirm_teammate_selection('Share meeting(s) with', chosen_teammates)
 
+    results = si.share_meetings(teammate.id for teammate in chosen_teammates)
     for teammate in chosen_teammates:
-        next_meeting = si.find_upcoming_meeting(teammate['id'])
-        if next_meeting:
-            si.share_meeting(next_meeting['id'])
-        else:
-            click.echo(f"No upcoming meeting found for {teammate['name']}")
+        try:
+            if not results[teammate.id].result():
+                click.echo(f"No upcoming meeting found for {teammate.name}")
+        except requests.Timeout:
+            pass
+
+    wait_for_results(
+        {teammate_id: [future] for teammate_id, future in results.items()},
+        chosen_teammates,
+    )
 
 
 @cli.command(name='view-meeting')
+@deadline_option
 def view_meeting():
     '''
     View an upcoming meeting
@@ -248,9 +629,22 @@ def view_meeting():
         raise click.BadParameter('You should only select one teammate')
 
     teammate = found_teammates[0]
-    name = teammate.get('nickname', teammate['firstName'])
+    name = teammate.nickname or teammate.firstName
+
+    try:
+        meeting = si.find_upcoming_meeting(teammate.id)
+    except requests.RequestException:
+        # SI is having trouble, fall back to the last meeting we saw
+        meeting = si.get_remembered_meeting(teammate.id)
+        if not meeting:
+            raise
+        click.echo(
+            'Could not reach Small Improvements, showing the last upcoming meeting we saw',
+            err=True,
+        )
+    else:
+        si.remember_meetings({teammate.id: meeting})
 
-    meeting = si.find_upcoming_meeting(teammate['id'])
     if not meeting:
         click.echo(f'You do not have an upcoming meeting with {name}')
         return
@@ -269,34 +663,356 @@ def view_meeting():
     help='When creating a meeting, should it default to draft?',
 )
 @click.option('desired_teammates', '--teammate', '-t', multiple=True)
+@click.option(
+    'note_file',
+    '--file',
+    type=click.Path(exists=True, dir_okay=False),
+    help='Read the note from a file',
+)
+@click.option(
+    'from_stdin',
+    '--stdin',
+    is_flag=True,
+    default=False,
+    help='Read the note from stdin. Needs -t and skips confirming',
+)
+@deadline_option
+@plan_option
 @click.argument('content', nargs=-1)
-def add_note(content, desired_teammates, is_draft_meeting, **note_options):
+def add_note(
+    content,
+    desired_teammates,
+    is_draft_meeting,
+    plan,
+    note_file,
+    from_stdin,
+    **note_options,
+):
     '''
     (Alias an) Adds a note to one or more meetings. If there is not
     an upcoming meeting with a teammate, one will be created. Any meetings
-    created default to 7 days since last meeting (or tomorrow if there are no
-    past meetings)
+    created default to one cadence (7 days, unless set with set-cadence) since
+    the last meeting, or tomorrow if there are no past meetings. Weekends and
+    holidays in ~/.small-improvements-holidays are skipped
+
+    Notes from --file or --stdin are read as Markdown, so headings and lists
+    are converted, and are uploaded as they are read, so they can be as big as
+    you like
+
+    Examples:
+
+    # Add a meeting transcript to the meeting with Alice
+
+    small-improvements an -t Alice --file transcript.md
+
+    some-command | small-improvements an -t Alice --stdin
     '''
-    if content:
-        content = ' '.join(content)
-    else:
-        content = click.edit()
-        if not content:
-            raise click.BadParameter('Must provide a note body')
+    if sum([bool(content), bool(note_file), from_stdin]) > 1:
+        raise click.BadParameter(
+            'Give the note as arguments, --file or --stdin, not more than one'
+        )
+    if from_stdin and not desired_teammates:
+        raise click.BadParameter('--stdin needs teammates picked with -t')
+
+    team = si.get_manager_and_team(refresh=not plan)
+    if plan:
+        print_plan(
+            'add-note',
+            process_or_prompt_teammate_selection(
+                desired_teammates, team, 'Who do you want to add the note to?'
+            ),
+        )
+        return
+
+    upcoming_meetings = prefetch_upcoming_meetings(desired_teammates, team)
+    spooled_path = None
+
+    try:
+        if from_stdin:
+            spooled_path = spool_stdin()
+            content = pathlib.Path(spooled_path)
+            click.echo('Note: from stdin')
+        elif note_file:
+            content = pathlib.Path(note_file)
+            click.echo(f'Note: from {note_file}')
+        else:
+            if content:
+                content = ' '.join(content)
+            else:
+                content = click.edit()
+                if not content:
+                    raise click.BadParameter('Must provide a note body')
 
-    click.echo(f'Note: {content}')
+            click.echo(f'Note: {content}')
 
-    team = si.get_manager_and_team()
+        chosen_teammates = process_or_prompt_teammate_selection(
+            desired_teammates, team, 'Who do you want to add the note to?'
+        )
 
-    chosen_teammates = process_or_prompt_teammate_selection(
-        desired_teammates, team, 'Who do you want to add the note to?'
+        # With --stdin the note used up stdin, so there is nothing to confirm with
+        if not from_stdin:
+            confirm_teammate_selection('Add this note to', chosen_teammates)
+
+        wait_for_results(
+            si.add_notes(
+                {teammate.id: [content] for teammate in chosen_teammates},
+                note_options=note_options,
+                is_draft=is_draft_meeting,
+                upcoming_meetings=upcoming_meetings,
+            ),
+            chosen_teammates,
+        )
+    finally:
+        cancel_prefetch(upcoming_meetings)
+        if spooled_path:
+            os.remove(spooled_path)
+
+
+@cli.command(name='cadence')
+@click.option(
+    'as_json', '--json', is_flag=True, default=False, help='Print JSON instead of a table'
+)
+@click.option(
+    '--window',
+    type=int,
+    default=constants.CADENCE_WINDOW_DAYS,
+    show_default=True,
+    help='How many days of past meetings to look at',
+)
+@deadline_option
+def cadence(as_json, window):
+    '''
+    Shows days since the last 1:1 and the next scheduled 1:1 for everybody on
+    your team, most overdue first
+    '''
+    report = si.get_cadence(window_days=window)
+
+    def sort_key(row):
+        stats = row['stats'] or {}
+        days_since_last = stats.get('daysSinceLast')
+        return (
+            not stats.get('overdue'),
+            -(days_since_last if days_since_last is not None else window + 1),
+            row['teammate'].name,
+        )
+
+    report.sort(key=sort_key)
+
+    if as_json:
+        for row in report:
+            click.echo(
+                json.dumps(
+                    dict(
+                        row['stats'] or {},
+                        teammate=row['teammate'].name,
+                        teammateId=row['teammate'].id,
+                        error=str(row['error']) if row['error'] else None,
+                    )
+                )
+            )
+        return
+
+    width = max([len('Name')] + [len(row['teammate'].name) for row in report])
+    click.echo(
+        f'{"Name":<{width}}  {"Last 1:1":<10}  {"Days":>5}  {"Next 1:1":<10}  '
+        f'{"Avg gap":>7}  {"Overdue":<7}  Suggested'
     )
+    for row in report:
+        name = row['teammate'].name
+        if row['error']:
+            click.echo(f'{name:<{width}}  Could not load meetings: {row["error"]}')
+            continue
+
+        stats = row['stats']
+        click.echo(
+            f'{name:<{width}}  {stats["lastMeeting"] or "-":<10}  '
+            f'{_or_dash(stats["daysSinceLast"]):>5}  {stats["nextMeeting"] or "-":<10}  '
+            f'{_or_dash(stats["averageGap"]):>7}  {"yes" if stats["overdue"] else "":<7}  '
+            f'{stats["suggestedNext"] or ""}'
+        )
 
-    confirm_teammate_selection('Add this note to', chosen_teammates)
 
-    for teammate in chosen_teammates:
-        meeting = si.find_or_create_meeting(teammate['id'], is_draft=is_draft_meeting)
-        si.add_note(meeting['id'], content, note_options=note_options)
+def _or_dash(value):
+    return '-' if value is None else str(value)
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        # Slower than the biggest bucket
+        return f'>{format_seconds(BUCKETS[-1])}'
+    if seconds < 1:
+        return f'{seconds * 1000:g}ms'
+    return f'{seconds:g}s'
+
+
+@cli.command(name='stats')
+@click.option('--days', type=int, help='Only include the last N days')
+@click.option(
+    'openmetrics_path',
+    '--openmetrics',
+    type=click.Path(dir_okay=False, writable=True),
+    help='Write an OpenMetrics textfile (ex. for node exporter) instead of printing',
+)
+def stats(days, openmetrics_path):
+    '''
+    Shows how long commands and SI requests have been taking. Percentiles are
+    the upper end of the bucket they fall in
+    '''
+    summary = metrics_store.summarize(days=days)
+
+    if openmetrics_path:
+        temp_path = f'{openmetrics_path}.tmp'
+        with open(temp_path, 'w') as openmetrics_file:
+            openmetrics_file.write(to_openmetrics(summary))
+        os.replace(temp_path, openmetrics_path)
+        return
+
+    if not any(summary.values()):
+        click.echo('No stats recorded yet')
+        return
+
+    for kind, title in [('command', 'Command'), ('endpoint', 'Endpoint')]:
+        histograms = summary[kind]
+        if not histograms:
+            continue
+
+        width = max(len(title), *map(len, histograms))
+        click.echo(f'{title:<{width}}  {"count":>7}  {"p50":>7}  {"p95":>7}  {"p99":>7}')
+        for name, histogram in sorted(histograms.items()):
+            columns = [
+                format_seconds(percentile(histogram, pct)) for pct in (0.5, 0.95, 0.99)
+            ]
+            click.echo(
+                f'{name:<{width}}  {sum(histogram["counts"]):>7}  '
+                + '  '.join(f'{column:>7}' for column in columns)
+            )
+        click.echo('')
+
+
+BATCH_OPERATIONS = ('add-talking-point', 'add-note', 'share-meeting')
+
+
+def resolve_batch_meeting(teammate, meetings, create=False, is_draft=False, schedule=None):
+    '''
+    Looks up the upcoming meeting for a teammate at most once per batch. A
+    lookup that finds nothing is remembered too, so creating the meeting later
+    doesn't repeat it. schedule is from si.load_schedule, for creating meetings
+    '''
+    if teammate.id not in meetings:
+        meetings[teammate.id] = si.find_upcoming_meeting(teammate.id)
+
+    if meetings[teammate.id] is None and create:
+        meetings[teammate.id] = si.create_next_meeting(
+            teammate.id, is_draft=is_draft, schedule=schedule
+        )
+
+    return meetings[teammate.id]
+
+
+def run_batch_operation(operation, team, meetings, schedule=None):
+    op = COMMAND_ALIASES.get(operation.get('op'), operation.get('op'))
+    if op not in BATCH_OPERATIONS:
+        raise click.BadParameter(f'Unknown operation: {operation.get("op")}')
+
+    selection = operation.get('teammates')
+    if not selection:
+        raise click.BadParameter('Must provide teammates')
+    if not isinstance(selection, str) and not (
+        isinstance(selection, list) and all(isinstance(s, str) for s in selection)
+    ):
+        raise click.BadParameter('teammates must be a string or a list of strings')
+
+    content = operation.get('content')
+    if op != 'share-meeting':
+        if not content:
+            raise click.BadParameter('Must provide content')
+        if not isinstance(content, str):
+            raise click.BadParameter('content must be a string')
+
+    found_teammates, missing_teammates = match_choices_to_teammates(selection, team)
+    options = {'is_private': bool(operation.get('private'))}
+    is_draft = bool(operation.get('draft_meeting'))
+
+    # Each teammate succeeds or fails on their own, so a retry knows which
+    # ones already went through
+    results = []
+    for teammate in found_teammates:
+        result = {'teammate': teammate.name, 'teammateId': teammate.id}
+        try:
+            if op == 'share-meeting':
+                meeting = resolve_batch_meeting(teammate, meetings)
+                if meeting:
+                    si.share_meeting(meeting.id)
+            else:
+                meeting = resolve_batch_meeting(
+                    teammate,
+                    meetings,
+                    create=True,
+                    is_draft=is_draft,
+                    schedule=schedule,
+                )
+                if op == 'add-talking-point':
+                    si.add_talking_point(
+                        meeting.id, content, talking_point_options=options
+                    )
+                else:
+                    si.add_note(meeting.id, content, note_options=options)
+            result['meetingId'] = meeting.id if meeting else None
+            result['ok'] = True
+        except requests.RequestException as e:
+            result['ok'] = False
+            result['error'] = str(e)
+        results.append(result)
+
+    return {'op': op, 'results': results, 'missing': missing_teammates}
+
+
+@cli.command(name='batch')
+@click.argument('operations', type=click.File('r'), default='-')
+@deadline_option
+def batch(operations):
+    '''
+    Runs many operations in one go, reading one JSON object per line (stdin by
+    default) and writing one JSON result per line. Meetings are only looked up
+    once per teammate, no matter how many operations touch them.
+
+    Each operation looks like:
+
+    {"op": "ap", "teammates": "alice,bob", "content": "Update on Project"}
+
+    `op` is one of add-talking-point (ap), add-note (an) or share-meeting (sm).
+    `teammates` takes the same selections as the prompts (or a list of them).
+    `private` and `draft_meeting` are optional flags. Any `id` given is echoed
+    back in the result. Each teammate in `results` has its own `ok` (and
+    `error`), so a failed line can be retried for just the teammates that
+    failed.
+    '''
+    team = si.get_manager_and_team()
+    meetings = {}
+    # Read once, rather than for every meeting the batch creates
+    schedule = si.load_schedule()
+
+    for line_number, line in enumerate(operations, start=1):
+        if not line.strip():
+            continue
+
+        result = {'line': line_number}
+        try:
+            operation = json.loads(line)
+            if not isinstance(operation, dict):
+                raise click.BadParameter('Each line must be a JSON object')
+            if 'id' in operation:
+                result['id'] = operation['id']
+            result.update(run_batch_operation(operation, team, meetings, schedule))
+            failed = [r['teammate'] for r in result['results'] if not r['ok']]
+            result['ok'] = not failed
+            if failed:
+                result['error'] = f'Failed for {", ".join(failed)}'
+        except (ValueError, click.BadParameter, requests.RequestException) as e:
+            result['ok'] = False
+            result['error'] = str(e)
+
+        click.echo(json.dumps(result))
 
 
 if __name__ == '__main__':
@@ -2,3 +2,54 @@ DATE_FORMAT = '%Y-%m-%d'
 DEFAULT_SUBDOMAIN = 'www'
 BASE_URL_TEMPLATE = 'https://{}.small-improvements.com'
 DEFAULT_BASE_URL = BASE_URL_TEMPLATE.format(DEFAULT_SUBDOMAIN)
+
+# Concurrent requests made by the bulk methods
+MAX_WORKERS = 8
+
+# Teams up to this size get all of their upcoming meetings looked up while
+# the user is still answering prompts
+PREFETCH_TEAM_LIMIT = 25
+
+# How SIClient talks to SI. One of `http1` or `http2`, see transports.py
+DEFAULT_TRANSPORT = 'http1'
+
+# (connect, read) timeouts in seconds for requests made without a deadline
+DEFAULT_TIMEOUT = (5, 30)
+
+# How many days of timings `stats` keeps around
+METRICS_RETENTION_DAYS = 56
+
+# Days apart 1:1s are expected to be when there isn't enough history to tell
+DEFAULT_CADENCE_DAYS = 7
+
+# Cadences that can be set per teammate, in days between 1:1s
+CADENCES = {'weekly': 7, 'biweekly': 14, 'monthly': 28}
+
+# How far back and forward `cadence` looks for meetings
+CADENCE_WINDOW_DAYS = 90
+CADENCE_LOOKAHEAD_DAYS = 60
+
+# Failures in a row before SIClient stops trying, and for how long
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN_SECONDS = 60
+
+# Hours before the cached team is refreshed in the background, and before it
+# is too old to use without refreshing first
+ROSTER_STALE_AFTER_HOURS = 24
+ROSTER_MAX_AGE_HOURS = 24 * 30
+
+# Don't start another background sync while one may still be running
+ROSTER_SYNC_RETRY_SECONDS = 10 * 60
+
+# Bytes read at a time when streaming a response
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Teams bigger than this get the interactive search-as-you-type picker, which
+# shows this many matches at a time
+PICKER_MIN_TEAM_SIZE = 15
+PICKER_RESULTS = 10
+
+# Columns of the CSV used by `roster import` and `roster export`. Names come
+# from SI, they are only exported to make the file easier to edit
+ROSTER_COLUMNS = ('id', 'name', 'nickname', 'hidden', 'cadence')
+ROSTER_TRUE_VALUES = ('1', 'x', 'y', 'yes', 'true')
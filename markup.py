@@ -0,0 +1,61 @@
+import re
+
+HEADING = re.compile(r'(#{1,6})\s+(.*?)\s*#*\s*$')
+BULLET = re.compile(r'\s*[-*+]\s+(.*)$')
+NUMBERED = re.compile(r'\s*\d+[.)]\s+(.*)$')
+
+
+def iter_lines(text):
+    '''
+    The lines of a string one at a time, the same as `text.split('\n')` but
+    without building the whole list
+    '''
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def iter_markup(lines):
+    '''
+    Converts text to SI markup a line at a time, so the whole note is never in
+    memory at once. Markdown headings (`#`), bulleted lists (`-`, `*`, `+`) and
+    numbered lists (`1.`) are converted, any other line becomes a paragraph
+    '''
+    open_list = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+
+        tag = None
+        match = BULLET.match(line)
+        if match:
+            tag = 'ul'
+        else:
+            match = NUMBERED.match(line)
+            if match:
+                tag = 'ol'
+
+        if open_list and tag != open_list:
+            yield f'</{open_list}>'
+            open_list = None
+
+        if tag:
+            if not open_list:
+                yield f'<{tag}>'
+                open_list = tag
+            yield f'<li>{match.group(1)}</li>'
+            continue
+
+        match = HEADING.match(line)
+        if match:
+            level = len(match.group(1))
+            yield f'<h{level}>{match.group(2)}</h{level}>'
+        else:
+            yield f'<p>{line}</p>'
+
+    if open_list:
+        yield f'</{open_list}>'
@@ -0,0 +1,199 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+
+import constants
+
+# Upper bounds of each histogram bucket, in seconds. Anything slower lands in
+# a final, unbounded bucket
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+KINDS = ('command', 'endpoint')
+
+
+def endpoint_name(method, url):
+    '''
+    Groups requests by what they hit rather than the exact url, e.g.
+    `POST /meetings/{id}/notes`
+    '''
+    path = url.split('/api/v2', 1)[-1].split('?', 1)[0]
+    return f"{method} {re.sub('/meetings/[^/]+', '/meetings/{id}', path)}"
+
+
+def new_histogram():
+    return {'counts': [0] * (len(BUCKETS) + 1), 'sum': 0.0}
+
+
+def observe(histogram, seconds):
+    index = len(BUCKETS)
+    for bucket_index, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            index = bucket_index
+            break
+    histogram['counts'][index] += 1
+    histogram['sum'] += seconds
+
+
+def merge(into, histogram):
+    for index, count in enumerate(histogram['counts']):
+        into['counts'][index] += count
+    into['sum'] += histogram['sum']
+
+
+def percentile(histogram, pct):
+    '''
+    Estimates a percentile as the upper bound of the bucket it falls in. Returns
+    None when it falls in the unbounded bucket
+    '''
+    total = sum(histogram['counts'])
+    if not total:
+        return None
+
+    target = pct * total
+    seen = 0
+    for index, count in enumerate(histogram['counts']):
+        seen += count
+        if seen >= target:
+            return BUCKETS[index] if index < len(BUCKETS) else None
+    return None
+
+
+def mean(histogram):
+    total = sum(histogram['counts'])
+    return histogram['sum'] / total if total else None
+
+
+def estimate_duration(chains, summary, workers):
+    '''
+    Rough wall time for chains of requests (each made one after the other)
+    that run side by side on `workers` threads, using the average time each
+    endpoint has taken. Returns the seconds and any endpoints there are no
+    timings for yet, which are left out of the estimate
+    '''
+    endpoints = summary.get('endpoint', {})
+    unknown = set()
+    total = longest = 0
+    for chain in chains:
+        chain_seconds = 0
+        for endpoint in chain:
+            seconds = mean(endpoints[endpoint]) if endpoint in endpoints else None
+            if seconds is None:
+                unknown.add(endpoint)
+            else:
+                chain_seconds += seconds
+        total += chain_seconds
+        longest = max(longest, chain_seconds)
+
+    return max(total / workers, longest), sorted(unknown)
+
+
+class Recorder(object):
+    '''
+    Collects timings in memory while a command runs, then adds them to the
+    metrics store in one write
+    '''
+
+    def __init__(self, store):
+        self.store = store
+        self._histograms = {kind: {} for kind in KINDS}
+        self._lock = threading.Lock()
+
+    def observe(self, kind, name, seconds):
+        with self._lock:
+            histogram = self._histograms[kind].setdefault(name, new_histogram())
+            observe(histogram, seconds)
+
+    def flush(self):
+        with self._lock:
+            histograms, self._histograms = (
+                self._histograms,
+                {kind: {} for kind in KINDS},
+            )
+        if any(histograms.values()):
+            self.store.add(histograms)
+
+
+class FileBackedMetricsStore(object):
+    '''
+    Histograms per day, kept for METRICS_RETENTION_DAYS days so the file stays
+    small no matter how much the tool is used
+    '''
+
+    LOCAL_FILE_NAME = '.small-improvements-metrics'
+
+    @property
+    def LOCAL_FILE(self):
+        return os.environ['HOME'] + f'/{self.LOCAL_FILE_NAME}'
+
+    def read_days(self):
+        try:
+            with open(self.LOCAL_FILE, 'rb') as metrics_file:
+                return json.loads(metrics_file.read()).get('days', {})
+        except (IOError, ValueError):
+            # Metrics are best effort, a missing or broken file just starts over
+            return {}
+
+    def add(self, histograms, today=None):
+        today = (today or datetime.now()).strftime(constants.DATE_FORMAT)
+        days = self._prune(self.read_days(), today)
+        day = days.setdefault(today, {kind: {} for kind in KINDS})
+        for kind, named_histograms in histograms.items():
+            for name, histogram in named_histograms.items():
+                merge(day[kind].setdefault(name, new_histogram()), histogram)
+
+        try:
+            temp_file = f'{self.LOCAL_FILE}.tmp'
+            with open(temp_file, 'w') as metrics_file:
+                metrics_file.write(json.dumps({'days': days}, sort_keys=True))
+            os.replace(temp_file, self.LOCAL_FILE)
+        except IOError:
+            pass
+
+    def summarize(self, days=None):
+        '''
+        Merges the stored days (optionally just the last `days` of them) into a
+        single histogram per command and endpoint
+        '''
+        stored = self.read_days()
+        if days:
+            cutoff = (datetime.now() - timedelta(days=days - 1)).strftime(
+                constants.DATE_FORMAT
+            )
+            stored = {date: day for date, day in stored.items() if date >= cutoff}
+
+        summary = {kind: {} for kind in KINDS}
+        for day in stored.values():
+            for kind in KINDS:
+                for name, histogram in day.get(kind, {}).items():
+                    merge(summary[kind].setdefault(name, new_histogram()), histogram)
+        return summary
+
+    def _prune(self, days, today):
+        cutoff = (
+            datetime.strptime(today, constants.DATE_FORMAT)
+            - timedelta(days=constants.METRICS_RETENTION_DAYS - 1)
+        ).strftime(constants.DATE_FORMAT)
+        return {date: day for date, day in days.items() if date >= cutoff}
+
+
+def to_openmetrics(summary):
+    lines = []
+    for kind in KINDS:
+        metric = f'small_improvements_{kind}_duration_seconds'
+        lines.append(f'# TYPE {metric} histogram')
+        lines.append(f'# UNIT {metric} seconds')
+        for name, histogram in sorted(summary[kind].items()):
+            label = f'{kind}="{_escape_label(name)}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), histogram['counts']):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_count{{{label}}} {cumulative}')
+            lines.append(f'{metric}_sum{{{label}}} {histogram["sum"]}')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
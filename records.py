@@ -0,0 +1,100 @@
+class Record(object):
+    '''
+    Compact, slot-based stand-in for the dicts we get back from SI. Attribute
+    names mirror the JSON keys so converting in and out is a straight copy.
+
+    Records still answer to `record['key']`, `record.get('key')` and `in`, so
+    code written against the raw dicts keeps working. A field set to None is
+    treated as missing, just like an absent key. Keys we don't know about are
+    kept to one side so nothing is lost when the cache is written back out.
+    Records hash on their id, so they can go in sets and be used as dict keys.
+    '''
+
+    __slots__ = ('_extra',)
+    FIELDS = ()
+
+    def __init__(self, **kwargs):
+        self._extra = None
+        for field in self.FIELDS:
+            setattr(self, field, kwargs.pop(field, None))
+        if kwargs:
+            self._extra = kwargs
+
+    @classmethod
+    def from_json(cls, data):
+        if isinstance(data, cls):
+            return data
+        return cls(**data)
+
+    def to_json(self):
+        data = {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def get(self, key, default=None):
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self._extra:
+            return self._extra.get(key, default)
+        return default
+
+    def keys(self):
+        return self.to_json().keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.to_json() == other.to_json()
+        if isinstance(other, dict):
+            return self.to_json() == other
+        return NotImplemented
+
+    def __hash__(self):
+        # Records are mutable, but the id they are hashed on never changes
+        return hash((type(self).__name__, self.get('id')))
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.to_json()!r})'
+
+
+class Teammate(Record):
+    __slots__ = (
+        'id',
+        'name',
+        'firstName',
+        'nickname',
+        'relationship',
+        'cadence',
+        'hidden',
+    )
+    FIELDS = __slots__
+
+
+class Meeting(Record):
+    __slots__ = ('id', 'calendarDate', 'isDraft', 'participants')
+    FIELDS = __slots__
@@ -0,0 +1,151 @@
+from datetime import date
+
+import click
+
+import constants
+
+
+def to_ordinal(calendar_date):
+    '''
+    Turns a `YYYY-MM-DD` date from SI into a day number. Much cheaper than
+    strptime when there are thousands of them
+    '''
+    return date(
+        int(calendar_date[0:4]), int(calendar_date[5:7]), int(calendar_date[8:10])
+    ).toordinal()
+
+
+def from_ordinal(ordinal):
+    if ordinal is None:
+        return None
+    return date.fromordinal(ordinal).strftime(constants.DATE_FORMAT)
+
+
+def load_holidays(path):
+    '''
+    Reads a holiday calendar: one `YYYY-MM-DD` per line, `#` starts a comment.
+    A missing file just means no holidays, and lines that aren't dates are
+    skipped with a warning
+    '''
+    holidays = set()
+    try:
+        with open(path) as holidays_file:
+            for line_number, line in enumerate(holidays_file, start=1):
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                try:
+                    holidays.add(to_ordinal(line))
+                except ValueError:
+                    click.echo(
+                        f'Skipping line {line_number} of {path}, {line} is not a '
+                        'YYYY-MM-DD date',
+                        err=True,
+                    )
+    except IOError:
+        pass
+    return holidays
+
+
+def is_business_day(ordinal, holidays):
+    # Ordinal 1 (0001-01-01) was a Monday
+    return (ordinal - 1) % 7 < 5 and ordinal not in holidays
+
+
+def next_business_days(days, holidays):
+    '''
+    Moves each day forward to the first business day on or after it. Builds one
+    lookup table over the range the days span, so it stays cheap however many
+    days there are
+    '''
+    if not days:
+        return []
+
+    start = min(days)
+    end = max(days)
+    while not is_business_day(end, holidays):
+        end += 1
+
+    table = [0] * (end - start + 1)
+    next_day = end
+    for day in range(end, start - 1, -1):
+        if is_business_day(day, holidays):
+            next_day = day
+        table[day - start] = next_day
+
+    return [table[day - start] for day in days]
+
+
+def next_meeting_day(last_day, cadence, today, holidays):
+    '''
+    next_meeting_days for a single teammate, without building a lookup table
+    '''
+    day = today + 1 if last_day is None else max(last_day + cadence, today)
+    while not is_business_day(day, holidays):
+        day += 1
+    return day
+
+
+def next_meeting_days(last_days, cadences, today, holidays):
+    '''
+    Works out when the next 1:1 should be for many teammates at once.
+
+    last_days and cadences are parallel lists of the last meeting's ordinal (or
+    None if there hasn't been one) and the days between 1:1s. Teammates we've
+    never met with get the next business day after today. Otherwise it is one
+    cadence after the last meeting, but never in the past, moved forward past
+    weekends and holidays
+    '''
+    candidates = [
+        today + 1 if last is None else max(last + cadence, today)
+        for last, cadence in zip(last_days, cadences)
+    ]
+    return next_business_days(candidates, holidays)
+
+
+def cadence_days(cadence):
+    return constants.CADENCES.get(cadence) or constants.DEFAULT_CADENCE_DAYS
+
+
+def compute_cadence(meeting_days, today, expected_gaps=None):
+    '''
+    Works out 1:1 cadence for a whole team in one pass.
+
+    meeting_days is a dict of teammate id to a list of meeting day ordinals and
+    today is an ordinal too. expected_gaps optionally gives the number of days a
+    teammate's 1:1s should be apart, otherwise their average gap (or
+    DEFAULT_CADENCE_DAYS) is used. Returns a dict of teammate id to stats
+    '''
+    expected_gaps = expected_gaps or {}
+    stats = {}
+    for teammate_id, days in meeting_days.items():
+        days = sorted(set(days))
+
+        last = next_day = None
+        gap_total = gaps = 0
+        previous = None
+        for day in days:
+            if day >= today:
+                next_day = day
+                break
+            if previous is not None:
+                gap_total += day - previous
+                gaps += 1
+            previous = last = day
+
+        average_gap = gap_total / gaps if gaps else None
+        expected_gap = (
+            expected_gaps.get(teammate_id) or average_gap or constants.DEFAULT_CADENCE_DAYS
+        )
+        days_since_last = today - last if last is not None else None
+        stats[teammate_id] = {
+            'lastMeeting': from_ordinal(last),
+            'nextMeeting': from_ordinal(next_day),
+            'daysSinceLast': days_since_last,
+            'daysUntilNext': next_day - today if next_day is not None else None,
+            'averageGap': round(average_gap, 1) if average_gap is not None else None,
+            'overdue': next_day is None
+            and (days_since_last is None or days_since_last > expected_gap),
+        }
+
+    return stats
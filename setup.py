@@ -10,11 +10,19 @@ setup(
         'small_improvements',
         'utils',
         'client',
+        'records',
+        'transports',
+        'metrics',
+        'scheduling',
+        'markup',
     ],
     install_requires=[
         'click',
         'requests',
     ],
+    extras_require={
+        'http2': ['httpx[http2]'],
+    },
     entry_points='''
         [console_scripts]
         small-improvements=commands:cli
@@ -1,45 +1,102 @@
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import requests
+
 import constants
 from caches import FileBackedCache, MemoryBackedCache
 from client import SIClient
+from markup import iter_lines, iter_markup
+from records import Meeting, Teammate
+from scheduling import (
+    cadence_days,
+    compute_cadence,
+    from_ordinal,
+    load_holidays,
+    next_meeting_day,
+    next_meeting_days,
+    to_ordinal,
+)
 
 
 class BaseSmallImprovements(object):
-    def __init__(self, token):
-        base_url = None
 
+    HOLIDAYS_FILE_NAME = '.small-improvements-holidays'
+
+    # What each bulk action adds to a meeting, as the endpoint it posts to
+    PLAN_ACTIONS = {
+        'add-talking-point': ('POST /meetings/{id}/talkingpoints', 'add talking point'),
+        'add-note': ('POST /meetings/{id}/notes', 'add note'),
+        'share-meeting': None,
+    }
+
+    def __init__(self, token):
         try:
-            base_url = self.get_base_url()
+            header = self.read_header()
         except:
-            pass
+            header = {}
+
+        self.client = SIClient(
+            token,
+            base_url=header.get('baseUrl') or None,
+            transport=os.environ.get('SI_TRANSPORT') or header.get('transport'),
+        )
+        self._executor = None
 
-        self.client = SIClient(token, base_url=base_url)
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=constants.MAX_WORKERS)
+        return self._executor
 
     def setup(self, subdomain):
         self.client.set_base_url(constants.BASE_URL_TEMPLATE.format(subdomain))
         self.sync_team(overwrite=True)
 
     def sync_team(self, overwrite=False):
+        # A long lived SmallImprovements would otherwise never see new hires
+        self.client.clear_cache()
         me = self.client.get_me()
 
-        fresh_team = self.client.get_team(me['id'])
+        # Fetched before reading the cache, so anything written to it while we
+        # wait on SI (e.g. a nickname, when this is a background sync) is kept
+        fresh_team = []
+        for teammate in self.client.iter_team(me['id']):
+            if teammate['isActive']:
+                fresh_team.append(
+                    Teammate(
+                        id=teammate['id'],
+                        name=teammate['name'],
+                        firstName=teammate['firstName'],
+                        relationship='report',
+                    ).to_json()
+                )
 
         if overwrite:
-            data = {}
+            header = {}
+            team = {}
         else:
             try:
-                data = self.read_data()
+                header = self.read_header()
+                team = self.read_shard('team')
             except:
                 # No eixsting data, start fresh
-                data = {}
+                header = {}
+                team = {}
+
+        header['syncedAt'] = int(time.time())
+        header.pop('syncStartedAt', None)
 
-        data['me'] = data.get('me', {})
-        data['me'].update({'id': me['id'], 'isManager': bool(me.get('reports', []))})
-        data['baseUrl'] = me.get('company', {}).get('baseUrl', '')
+        header['me'] = header.get('me', {})
+        header['me'].update({'id': me['id'], 'isManager': bool(me.get('reports', []))})
+        header['baseUrl'] = me.get('company', {}).get('baseUrl', '')
 
-        data['manager'] = data.get('manager', {})
-        data['manager'].update(
+        header['manager'] = header.get('manager', {})
+        header['manager'].update(
             {
                 'id': me['manager']['id'],
                 'firstName': me['manager']['firstName'],
@@ -48,56 +105,205 @@ class BaseSmallImprovements(object):
             }
         )
 
-        team = data.get('team', {})
+        keys_by_id = {existing['id']: key for key, existing in team.items()}
         for teammate in fresh_team:
-            if not teammate['isActive']:
-                continue
-
-            teammate = {k: teammate[k] for k in ['firstName', 'name', 'id']}
-            teammate['relationship'] = 'report'
-            found = False
-            for key, existing_teammate in team.items():
-                if teammate['id'] == existing_teammate['id']:
-                    existing_teammate.update(teammate)
-                    found = True
-                    break
-
-            if not found:
+            key = keys_by_id.get(teammate['id'])
+            if key is not None:
+                team[key].update(teammate)
+            else:
                 team[teammate['name']] = teammate
 
-        data['team'] = team
-        self.write_data(data)
+        # Only the team shard and header change, so meetings remembered in the
+        # meantime aren't overwritten. Setup starts everything over
+        if overwrite:
+            self.write_data(dict(header, team=team))
+        else:
+            self.write_shard('team', team)
+            self.write_header(header)
 
     def get_base_url(self):
-        data = self.read_data()
-        return data.get('baseUrl') or constants.DEFAULT_BASE_URL
+        header = self.read_header()
+        return header.get('baseUrl') or constants.DEFAULT_BASE_URL
 
     def get_me(self):
-        data = self.read_data()
-        return data.get('me')
+        header = self.read_header()
+        return header.get('me')
 
-    def get_manager_and_team(self):
-        return [self.get_manager()] + list(self.get_team().values())
+    def get_manager_and_team(self, refresh=True):
+        '''
+        The manager (if there is one) and visible reports from the cache. With
+        refresh, a stale roster is synced first (see refresh_team_if_stale)
+        '''
+        header = self.read_header()
+        if refresh:
+            header = self.refresh_team_if_stale(header)
+        manager = header.get('manager')
+        return ([Teammate.from_json(manager)] if manager else []) + [
+            teammate for teammate in self.get_team().values() if not teammate.hidden
+        ]
+
+    def refresh_team_if_stale(self, header):
+        '''
+        Serves the cached team as is, but once it is older than
+        rosterStaleAfterHours kicks off a sync in the background for next time.
+        Past rosterMaxAgeHours the sync happens right away instead. Both can be
+        set in the cache header. Returns the (possibly refreshed) header
+        '''
+        now = time.time()
+        age = now - header.get('syncedAt', 0)
+        stale_after = header.get(
+            'rosterStaleAfterHours', constants.ROSTER_STALE_AFTER_HOURS
+        )
+        max_age = header.get('rosterMaxAgeHours', constants.ROSTER_MAX_AGE_HOURS)
+
+        if 'syncedAt' in header and max_age and age > max_age * 3600:
+            try:
+                self.sync_team()
+                return self.read_header()
+            except requests.RequestException:
+                # Can't reach SI, an old roster is better than none
+                return header
+
+        if age > stale_after * 3600:
+            sync_started_at = header.get('syncStartedAt', 0)
+            if now - sync_started_at > constants.ROSTER_SYNC_RETRY_SECONDS:
+                self.write_header(dict(header, syncStartedAt=int(now)))
+                self.start_background_sync()
+
+        return header
+
+    def start_background_sync(self):
+        '''
+        Runs sync_team in a detached process, so the current command doesn't
+        wait on it
+        '''
+        kwargs = {}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.DETACHED_PROCESS
+        else:
+            kwargs['start_new_session'] = True
+
+        try:
+            subprocess.Popen(
+                [sys.executable, '-m', 'small_improvements', 'sync-team'],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                close_fds=True,
+                **kwargs,
+            )
+        except OSError:
+            pass
 
     def get_manager(self):
-        data = self.read_data()
-        return data.get('manager')
+        manager = self.read_header().get('manager')
+        return Teammate.from_json(manager) if manager else None
 
     def get_team(self):
-        data = self.read_data()
-        return data.get('team')
+        team = self.read_shard('team')
+        return {key: Teammate.from_json(teammate) for key, teammate in team.items()}
+
+    def get_team_cadences(self):
+        '''
+        Dict of teammate id to the cadence set for them (ex. `biweekly`)
+        '''
+        return {
+            teammate['id']: teammate['cadence']
+            for teammate in self.read_shard('team').values()
+            if teammate.get('cadence')
+        }
+
+    def set_cadence(self, teammate, cadence):
+        if cadence and cadence not in constants.CADENCES:
+            raise ValueError(f'Unknown cadence: {cadence}')
+
+        team = self.read_shard('team')
+
+        for key, existing_teammate in team.items():
+            if teammate.id == existing_teammate['id']:
+                if cadence:
+                    team[key]['cadence'] = cadence
+                else:
+                    team[key].pop('cadence', None)
+                break
+
+        self.write_shard('team', team)
+
+    def get_holidays(self):
+        '''
+        Day ordinals to never schedule meetings on, from a file with one
+        `YYYY-MM-DD` per line
+        '''
+        return load_holidays(os.environ['HOME'] + f'/{self.HOLIDAYS_FILE_NAME}')
 
     def add_nickname(self, teammate, nickname):
-        data = self.read_data()
+        team = self.read_shard('team')
 
-        for key, existing_teammate in data['team'].items():
-            if teammate['id'] == existing_teammate['id']:
-                data['team'][key]['nickname'] = nickname
+        for key, existing_teammate in team.items():
+            if teammate.id == existing_teammate['id']:
+                team[key]['nickname'] = nickname
                 break
 
-        self.write_data(data)
+        self.write_shard('team', team)
+
+    def export_roster(self):
+        '''
+        The cached team as rows of ROSTER_COLUMNS, ready for csv.DictWriter
+        '''
+        return [
+            {
+                'id': teammate.id,
+                'name': teammate.name,
+                'nickname': teammate.nickname or '',
+                'hidden': 'yes' if teammate.hidden else '',
+                'cadence': teammate.cadence or '',
+            }
+            for teammate in self.get_team().values()
+        ]
+
+    def import_roster(self, rows):
+        '''
+        Applies nicknames, hidden flags and cadences from rows of ROSTER_COLUMNS
+        (e.g. from csv.DictReader) in one read and write of the team. Rows are
+        matched by id. A column left out leaves that setting alone, an empty
+        cell clears it. Nothing is written if any row is invalid. Returns the
+        number of teammates updated and the ids that aren't on the team
+        '''
+        team = self.read_shard('team')
+        keys_by_id = {teammate['id']: key for key, teammate in team.items()}
+
+        updated = 0
+        unknown_ids = []
+        for line, row in enumerate(rows, start=2):
+            teammate_id = (row.get('id') or '').strip()
+            key = keys_by_id.get(teammate_id)
+            if key is None:
+                unknown_ids.append(teammate_id)
+                continue
 
-    def find_or_create_meeting(self, teammate_id, is_draft=False):
+            changes = {}
+            if row.get('nickname') is not None:
+                changes['nickname'] = row['nickname'].strip() or None
+            if row.get('hidden') is not None:
+                hidden = row['hidden'].strip().lower() in constants.ROSTER_TRUE_VALUES
+                changes['hidden'] = hidden or None
+            if row.get('cadence') is not None:
+                cadence = row['cadence'].strip().lower() or None
+                if cadence and cadence not in constants.CADENCES:
+                    raise ValueError(f'Unknown cadence on line {line}: {cadence}')
+                changes['cadence'] = cadence
+
+            teammate = Teammate.from_json(team[key])
+            for field, value in changes.items():
+                setattr(teammate, field, value)
+            team[key] = teammate.to_json()
+            updated += 1
+
+        self.write_shard('team', team)
+        return updated, unknown_ids
+
+    def find_or_create_meeting(self, teammate_id, is_draft=False, schedule=None):
         '''
         Finds the upcoming meeting, or creates it if it doesn't exist
 
@@ -105,31 +311,57 @@ class BaseSmallImprovements(object):
         '''
         next_meeting = self.find_upcoming_meeting(teammate_id)
         if not next_meeting:
-            now = datetime.now()
-            last_week = now - timedelta(
-                days=8
-            )  # 8 days to be safe with any TZ math SI may do
-            meetings = self.client.get_meetings_with_teammate(
-                teammate_id, start_date=last_week
-            )
-            if meetings:
-                # Assume meeting should occur 7 days since last one
-                last_meeting_date = datetime.strptime(
-                    meetings[0]['calendarDate'], constants.DATE_FORMAT
-                )
-                meeting_date = last_meeting_date + timedelta(days=7)
-            else:
-                # Never had a meeting with this teammate, so default to tomorrow
-                meeting_date = now + timedelta(days=1)
-
-            me = self.get_me()
-            status = 'DRAFT' if is_draft else 'SHARED'
-            next_meeting = self.client.create_meeting(
-                me['id'], teammate_id, meeting_date, status=status
+            next_meeting = self.create_next_meeting(
+                teammate_id, is_draft=is_draft, schedule=schedule
             )
 
         return next_meeting
 
+    def load_schedule(self):
+        '''
+        Everything create_next_meeting needs from the cache and holiday file, so
+        creating meetings for a whole team only reads them once
+        '''
+        return {
+            'ownerId': self.get_me()['id'],
+            'cadences': self.get_team_cadences(),
+            'holidays': self.get_holidays(),
+        }
+
+    def create_next_meeting(self, teammate_id, is_draft=False, schedule=None):
+        '''
+        Creates the next meeting with a teammate, without checking for an
+        upcoming one first. Useful when the caller already knows there isn't one.
+        schedule is from load_schedule, loaded fresh if not given
+        '''
+        schedule = schedule or self.load_schedule()
+        now = datetime.now()
+        today = now.date().toordinal()
+        cadence = cadence_days(schedule['cadences'].get(teammate_id))
+        meetings = self.client.iter_meetings_with_teammate(
+            teammate_id, start_date=now - timedelta(days=cadence + 1)
+        )  # A day extra to be safe with any TZ math SI may do
+
+        last_day = max(
+            (
+                day
+                for day in (to_ordinal(meeting['calendarDate']) for meeting in meetings)
+                if day <= today
+            ),
+            default=None,
+        )
+        # One cadence on from the last meeting (or tomorrow if there wasn't
+        # one), skipping weekends and holidays
+        meeting_day = next_meeting_day(last_day, cadence, today, schedule['holidays'])
+        meeting_date = datetime.fromordinal(meeting_day)
+
+        status = 'DRAFT' if is_draft else 'SHARED'
+        return Meeting.from_json(
+            self.client.create_meeting(
+                schedule['ownerId'], teammate_id, meeting_date, status=status
+            )
+        )
+
     def find_upcoming_meeting(self, teammate_id):
         """
         Finds the first (most imminent) for a particular teammate
@@ -139,10 +371,40 @@ class BaseSmallImprovements(object):
         now = datetime.now()
         meetings = self.client.get_meetings_with_teammate(teammate_id, start_date=now)
         if meetings:
-            next_meeting = meetings[0]
+            next_meeting = Meeting.from_json(meetings[0])
 
         return next_meeting
 
+    def remember_meetings(self, meetings_by_teammate):
+        '''
+        Keeps the upcoming meetings we've seen in the cache, so they can still be
+        shown when SI can't be reached. Only the id and date are kept, the rest of
+        a meeting (talking points, notes) has no business in a plain text file
+        '''
+        meetings = self.read_shard('meetings')
+        for teammate_id, meeting in meetings_by_teammate.items():
+            if meeting:
+                meeting = Meeting.from_json(meeting)
+                meetings[teammate_id] = {
+                    'id': meeting.id,
+                    'calendarDate': meeting.calendarDate,
+                }
+        self.write_shard('meetings', meetings)
+
+    def get_remembered_meeting(self, teammate_id):
+        '''
+        The last upcoming meeting we saw with a teammate, as long as it hasn't
+        happened yet
+        '''
+        return self._if_upcoming(self.read_shard('meetings').get(teammate_id))
+
+    def _if_upcoming(self, meeting):
+        if meeting and meeting['calendarDate'] >= datetime.now().strftime(
+            constants.DATE_FORMAT
+        ):
+            return Meeting.from_json(meeting)
+        return None
+
     def get_meeting_url(self, meeting):
         base_url = self.get_base_url()
         return f"{base_url}/app/meeting/{meeting['id']}"
@@ -160,8 +422,294 @@ class BaseSmallImprovements(object):
         self.client.share_meeting(meeting_id)
 
     def add_note(self, meeting_id, content, note_options=None):
-        content = self._convert_text_to_markup(content)
+        '''
+        content is the text of the note, or the path to a Markdown file of it.
+        Files are converted and uploaded as they are read, so they can be any
+        size
+        '''
+        if isinstance(content, os.PathLike):
+            with open(content, encoding='utf-8') as note_file:
+                self._add_note(meeting_id, iter_markup(note_file), note_options)
+        else:
+            self._add_note(
+                meeting_id, self._convert_text_to_markup(content), note_options
+            )
+
+    def find_upcoming_meetings(self, teammate_ids):
+        '''
+        Bulk version of find_upcoming_meeting. Returns a dict of teammate id to
+        a future that resolves to the upcoming meeting (or None)
+        '''
+        # Each bulk call starts fresh, a meeting remembered from an earlier one
+        # may have been shared, moved or deleted since
+        self.client.clear_cache()
+        return {
+            teammate_id: self.executor.submit(self.find_upcoming_meeting, teammate_id)
+            for teammate_id in dict.fromkeys(teammate_ids)
+        }
+
+    def find_or_create_meetings(
+        self, teammate_ids, is_draft=False, upcoming_meetings=None
+    ):
+        '''
+        Bulk version of find_or_create_meeting. Returns a dict of teammate id to
+        a future that resolves to the meeting
+
+        upcoming_meetings can be the result of an earlier find_upcoming_meetings
+        call (e.g. a prefetch), so those lookups aren't made twice
+        '''
+        if not upcoming_meetings:
+            # Otherwise they were just cleared by find_upcoming_meetings
+            self.client.clear_cache()
+        upcoming_meetings = upcoming_meetings or {}
+        # Read once here rather than by every meeting that needs creating
+        schedule = self.load_schedule()
+        meetings = {}
+        for teammate_id in dict.fromkeys(teammate_ids):
+            if teammate_id in upcoming_meetings:
+                meetings[teammate_id] = self.executor.submit(
+                    self._find_or_create_from_upcoming,
+                    upcoming_meetings[teammate_id],
+                    teammate_id,
+                    is_draft,
+                    schedule,
+                )
+            else:
+                meetings[teammate_id] = self.executor.submit(
+                    self.find_or_create_meeting,
+                    teammate_id,
+                    is_draft=is_draft,
+                    schedule=schedule,
+                )
+        return meetings
+
+    def share_meetings(self, teammate_ids):
+        '''
+        Shares the upcoming meeting with each teammate. Returns a dict of teammate
+        id to a future that resolves to the shared meeting (or None if there
+        was no upcoming meeting)
+        '''
+        meetings = self.find_upcoming_meetings(teammate_ids)
+        return {
+            teammate_id: self.executor.submit(self._share_found_meeting, meeting)
+            for teammate_id, meeting in meetings.items()
+        }
+
+    def add_talking_points(
+        self,
+        talking_points_by_teammate,
+        talking_point_options=None,
+        is_draft=False,
+        upcoming_meetings=None,
+    ):
+        '''
+        Adds talking points to many meetings at once. Takes a dict of teammate id
+        to a list of talking points and returns a dict of teammate id to a list
+        of futures that resolve to the meeting they were added to. A teammate's
+        talking points are added in order, one after another
+        '''
+        return self._add_to_meetings(
+            talking_points_by_teammate,
+            self.add_talking_point,
+            is_draft,
+            upcoming_meetings,
+            talking_point_options=talking_point_options,
+        )
+
+    def add_notes(
+        self, notes_by_teammate, note_options=None, is_draft=False, upcoming_meetings=None
+    ):
+        '''
+        Adds notes to many meetings at once. Same shape as add_talking_points
+        '''
+        return self._add_to_meetings(
+            notes_by_teammate,
+            self.add_note,
+            is_draft,
+            upcoming_meetings,
+            note_options=note_options,
+        )
 
+    def plan_requests(self, teammate_ids, action, items_per_teammate=1):
+        '''
+        The requests a bulk add or share would make, without making any. action
+        is one of PLAN_ACTIONS. Returns a dict of teammate id to the upcoming
+        meeting remembered in the cache (or None) and the requests in the order
+        they'd be made. Requests that depend on whether there is an upcoming
+        meeting are conditional, and expected if the cache says they'll happen
+        '''
+        if action not in self.PLAN_ACTIONS:
+            raise ValueError(f'Unknown action: {action}')
+
+        remembered = self.read_shard('meetings')
+        plans = {}
+        for teammate_id in dict.fromkeys(teammate_ids):
+            meeting = self._if_upcoming(remembered.get(teammate_id))
+            planned = [self._planned('GET /meetings', 'find upcoming meeting')]
+
+            if action == 'share-meeting':
+                planned.append(
+                    self._planned(
+                        'PATCH /meetings/{id}', 'share meeting', expected=meeting is not None
+                    )
+                )
+            else:
+                for endpoint, reason in [
+                    ('GET /meetings', 'find last meeting to schedule from'),
+                    ('POST /meetings', 'create meeting'),
+                ]:
+                    planned.append(
+                        self._planned(endpoint, reason, expected=meeting is None)
+                    )
+                endpoint, reason = self.PLAN_ACTIONS[action]
+                planned.extend(
+                    self._planned(endpoint, reason) for _ in range(items_per_teammate)
+                )
+
+            plans[teammate_id] = {'meeting': meeting, 'requests': planned}
+
+        return plans
+
+    def get_cadence(self, window_days=None, lookahead_days=None):
+        '''
+        1:1 cadence for every report: last and next meeting, days since the last
+        one, the average gap and whether a meeting is overdue. Meetings for the
+        whole team are fetched concurrently. Returns a list of dicts, each with
+        the teammate and their stats (or the error that stopped us getting them)
+        '''
+        window_days = window_days or constants.CADENCE_WINDOW_DAYS
+        lookahead_days = lookahead_days or constants.CADENCE_LOOKAHEAD_DAYS
+        now = datetime.now()
+        start_date = now - timedelta(days=window_days)
+        end_date = now + timedelta(days=lookahead_days)
+
+        self.client.clear_cache()
+        team = [
+            teammate for teammate in self.get_team().values() if not teammate.hidden
+        ]
+        futures = {
+            teammate.id: self.executor.submit(
+                self._get_meeting_days, teammate.id, start_date, end_date
+            )
+            for teammate in team
+        }
+
+        meeting_days = {}
+        errors = {}
+        for teammate_id, future in futures.items():
+            try:
+                meeting_days[teammate_id] = future.result()
+            except requests.RequestException as e:
+                errors[teammate_id] = e
+
+        today = now.date().toordinal()
+        stats = compute_cadence(
+            meeting_days,
+            today,
+            expected_gaps={
+                teammate.id: cadence_days(teammate.cadence)
+                for teammate in team
+                if teammate.cadence
+            },
+        )
+
+        # Suggest when the next 1:1 should be for anybody without one
+        unscheduled = [
+            teammate
+            for teammate in team
+            if teammate.id in stats and not stats[teammate.id]['nextMeeting']
+        ]
+        suggested_days = next_meeting_days(
+            [
+                to_ordinal(stats[teammate.id]['lastMeeting'])
+                if stats[teammate.id]['lastMeeting']
+                else None
+                for teammate in unscheduled
+            ],
+            [cadence_days(teammate.cadence) for teammate in unscheduled],
+            today,
+            self.get_holidays(),
+        )
+        for teammate_stats in stats.values():
+            teammate_stats['suggestedNext'] = None
+        for teammate, day in zip(unscheduled, suggested_days):
+            stats[teammate.id]['suggestedNext'] = from_ordinal(day)
+        return [
+            {
+                'teammate': teammate,
+                'stats': stats.get(teammate.id),
+                'error': errors.get(teammate.id),
+            }
+            for teammate in team
+        ]
+
+    def _planned(self, endpoint, reason, expected=None):
+        return {
+            'endpoint': endpoint,
+            'reason': reason,
+            'conditional': expected is not None,
+            'expected': expected is not False,
+        }
+
+    def _get_meeting_days(self, teammate_id, start_date, end_date):
+        # Only the dates are kept, not the meetings, so long histories stay cheap
+        return [
+            to_ordinal(meeting['calendarDate'])
+            for meeting in self.client.iter_meetings_with_teammate(
+                teammate_id, start_date=start_date, end_date=end_date
+            )
+        ]
+
+    def _add_to_meetings(
+        self, items_by_teammate, add, is_draft, upcoming_meetings, **options
+    ):
+        # Meetings are all submitted before any items, so an item never waits
+        # on a meeting that is still queued behind it. Each teammate's items
+        # are added one after another, so SI gets them in order
+        meetings = self.find_or_create_meetings(
+            items_by_teammate, is_draft=is_draft, upcoming_meetings=upcoming_meetings
+        )
+        return {
+            teammate_id: [
+                self.executor.submit(
+                    self._add_all_to_found_meeting,
+                    meetings[teammate_id],
+                    add,
+                    items,
+                    options,
+                )
+            ]
+            for teammate_id, items in items_by_teammate.items()
+        }
+
+    def _find_or_create_from_upcoming(
+        self, upcoming_future, teammate_id, is_draft, schedule
+    ):
+        try:
+            meeting = upcoming_future.result()
+        except (requests.RequestException, CancelledError):
+            # The prefetch failed while the user was still typing, which is
+            # no reason to give up on this teammate without trying again
+            return self.find_or_create_meeting(
+                teammate_id, is_draft=is_draft, schedule=schedule
+            )
+        return meeting or self.create_next_meeting(
+            teammate_id, is_draft=is_draft, schedule=schedule
+        )
+
+    def _add_all_to_found_meeting(self, meeting_future, add, items, options):
+        meeting = meeting_future.result()
+        for item in items:
+            add(meeting.id, item, **options)
+        return meeting
+
+    def _share_found_meeting(self, meeting_future):
+        meeting = meeting_future.result()
+        if meeting:
+            self.share_meeting(meeting.id)
+        return meeting
+
+    def _add_note(self, meeting_id, content, note_options):
         visibility = 'SHARED'
         if note_options:
             if note_options.get('is_private'):
@@ -170,7 +718,9 @@ class BaseSmallImprovements(object):
         self.client.add_note(meeting_id, content, visibility=visibility)
 
     def _convert_text_to_markup(self, text):
-        return ''.join(map(lambda x: f'<p>{x}</p>', text.split('\n')))
+        # Typed notes and talking points are plain text, a paragraph a line.
+        # Only files (see add_note) are read as Markdown
+        return ''.join(f'<p>{line}</p>' for line in iter_lines(text))
 
 
 class SmallImprovements(BaseSmallImprovements, FileBackedCache):
@@ -178,4 +728,15 @@ class SmallImprovements(BaseSmallImprovements, FileBackedCache):
 
 
 class MemorySmallImprovements(BaseSmallImprovements, MemoryBackedCache):
-    pass
+    def get_holidays(self):
+        return getattr(self, '_holidays', set())
+
+    def start_background_sync(self):
+        # Another process can't see our memory, so just sync here
+        self.sync_team()
+
+
+if __name__ == '__main__':
+    # Used by start_background_sync
+    if sys.argv[1:] == ['sync-team']:
+        SmallImprovements(os.environ.get('SI_TOKEN')).sync_team()
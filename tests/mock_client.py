@@ -4,10 +4,20 @@ import constants
 
 
 class MockSIClient(object):
+    deadline = None
+    metrics = None
+
     def __init__(self, *args, **kwargs):
         self._meetings = []
         self._last_talking_point = {}
         self._last_note = {}
+        self._talking_points = []
+        self._notes = []
+        self._shared_meetings = []
+        self._cache_clears = 0
+
+    def clear_cache(self):
+        self._cache_clears += 1
 
     def _set_meetings(self, meetings):
         for meeting in meetings:
@@ -42,6 +52,9 @@ class MockSIClient(object):
             },
         ]
 
+    def iter_team(self, manager_id):
+        return iter(self.get_team(manager_id))
+
     def create_meeting(self, owner_id, teammate_id, meeting_date, status='SHARED'):
         is_draft = False if status == 'SHARED' else True
         return {
@@ -64,20 +77,28 @@ class MockSIClient(object):
 
         return self._meetings
 
+    def iter_meetings_with_teammate(self, teammate_id, start_date=None, end_date=None):
+        return iter(self.get_meetings_with_teammate(teammate_id, start_date, end_date))
+
     def share_meeting(self, meeting_id):
-        pass
+        self._shared_meetings.append(meeting_id)
 
     def add_talking_point(self, meeting_id, content, **talking_point_options):
         self._last_talking_point = {
             'args': [meeting_id, content],
             'kwargs': talking_point_options,
         }
+        self._talking_points.append(self._last_talking_point)
 
     def add_note(self, meeting_id, content, **note_options):
+        if not isinstance(content, str):
+            # Streamed from a file
+            content = ''.join(content)
         self._last_note = {
             'args': [meeting_id, content],
             'kwargs': note_options,
         }
+        self._notes.append(self._last_note)
 
     def set_base_url(self, base_url=None):
         pass
@@ -1,13 +1,21 @@
+import json
 import os
+import shutil
+import tempfile
 import unittest
 
-from caches import FileBackedCache, CacheException
+from caches import CacheException, FileBackedCache, MemoryBackedCache
+
+EXAMPLE_TEAM = os.getcwd() + '/tests/files/example-team'
 
 
 class TestableFileBackedCache(FileBackedCache):
+    def __init__(self, directory):
+        self.directory = directory
+
     @property
     def LOCAL_FILE(self):
-        return os.getcwd() + '/tests/files/example-team'
+        return self.directory + '/example-team'
 
 
 class MissingFileBackedCache(FileBackedCache):
@@ -17,8 +25,16 @@ class MissingFileBackedCache(FileBackedCache):
 
 
 class TestCaches(unittest.TestCase):
+    def setUp(self):
+        # Reading migrates the example file, so work on a copy of it
+        self.directory = tempfile.mkdtemp()
+        shutil.copy(EXAMPLE_TEAM, self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
     def test_file_cache(self):
-        cache = TestableFileBackedCache()
+        cache = TestableFileBackedCache(self.directory)
 
         self.assertTrue(cache.is_setup())
         self.assertTrue(cache.read_data())
@@ -27,3 +43,60 @@ class TestCaches(unittest.TestCase):
         cache = MissingFileBackedCache()
         with self.assertRaises(CacheException):
             cache.read_data()
+        with self.assertRaises(CacheException):
+            cache.read_shard('team')
+
+    def test_file_cache_migrates_to_shards(self):
+        cache = TestableFileBackedCache(self.directory)
+        with open(EXAMPLE_TEAM) as example:
+            original = json.load(example)
+
+        header = cache.read_header()
+        self.assertEqual(original['me'], header['me'])
+        self.assertNotIn('team', header)
+
+        # The header file now only holds the header, the team lives in its shard
+        with open(cache.LOCAL_FILE) as header_file:
+            self.assertNotIn('team', json.load(header_file))
+        self.assertEqual(original['team'], cache.read_shard('team'))
+        self.assertEqual({}, cache.read_shard('meetings'))
+
+    def test_file_cache_migrates_when_reading_shard_first(self):
+        cache = TestableFileBackedCache(self.directory)
+
+        self.assertIn('Alice Appleton', cache.read_shard('team'))
+        self.assertTrue(os.path.isfile(cache.shard_file('team')))
+
+    def test_file_cache_round_trips(self):
+        cache = TestableFileBackedCache(self.directory)
+        data = cache.read_data()
+        data['team']['Alice Appleton']['nickname'] = 'Ali'
+        cache.write_data(data)
+
+        self.assertEqual(data, cache.read_data())
+        self.assertEqual('Ali', cache.read_shard('team')['Alice Appleton']['nickname'])
+
+    def test_file_cache_writes_atomically(self):
+        cache = TestableFileBackedCache(self.directory)
+        cache.write_data(cache.read_data())
+
+        # Files are swapped in whole, no temp files are left behind
+        self.assertEqual(
+            sorted(
+                [os.path.basename(cache.LOCAL_FILE)]
+                + [os.path.basename(cache.shard_file(shard)) for shard in cache.SHARDS]
+            ),
+            sorted(os.listdir(self.directory)),
+        )
+
+    def test_memory_cache(self):
+        cache = MemoryBackedCache()
+        self.assertFalse(cache.is_setup())
+        with self.assertRaises(CacheException):
+            cache.read_header()
+
+        cache.write_data({'baseUrl': 'https://example.com', 'team': {'a': {}}})
+        self.assertTrue(cache.is_setup())
+        self.assertEqual('https://example.com', cache.read_header()['baseUrl'])
+        self.assertEqual({'a': {}}, cache.read_shard('team'))
+        self.assertEqual({}, cache.read_shard('meetings'))
@@ -0,0 +1,316 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+
+import requests
+
+import constants
+from client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    SIClient,
+    iter_json_array,
+    iter_json_chunks,
+)
+
+
+class FakeResponse(object):
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+        self.closed = False
+
+    def iter_content(self, chunk_size=None):
+        body = json.dumps(self.data).encode()
+        for start in range(0, len(body), 4):
+            yield body[start:start + 4]
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f'HTTP {self.status_code}')
+
+    def json(self):
+        return self.data
+
+
+class FakeTransport(object):
+    def __init__(self):
+        self.gets = []
+        self.writes = []
+        self.release = None
+        self.fail_next = False
+        self.down = False
+        self.timing_out = False
+
+    def request(self, method, url, params=None, **kwargs):
+        if method != 'GET':
+            self.writes.append(url)
+            return FakeResponse({'id': 'new'})
+
+        self.gets.append((url, params))
+        self.last_response = None
+        if self.down:
+            raise requests.ConnectionError('down')
+        if self.timing_out:
+            raise requests.ReadTimeout('slow')
+        self.last_timeout = kwargs.get('timeout')
+        if self.release:
+            self.release.wait(5)
+        if self.fail_next:
+            self.fail_next = False
+            return FakeResponse(None, status_code=500)
+        self.last_response = FakeResponse(
+            [{'id': len(self.gets)}, {'id': 'another'}, {'id': 'and another'}]
+        )
+        return self.last_response
+
+
+class TestableCircuitBreaker(CircuitBreaker):
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+
+    @property
+    def LOCAL_FILE(self):
+        return self.directory + '/breaker'
+
+
+class TestSIClient(unittest.TestCase):
+    def setUp(self):
+        self.client = SIClient('fake_token')
+        self.transport = self.client.transport = FakeTransport()
+
+    def test_repeated_gets_are_remembered(self):
+        first = self.client.get_meetings_with_teammate('alice')
+        second = self.client.get_meetings_with_teammate('alice')
+
+        self.assertEqual(first, second)
+        self.assertEqual(1, len(self.transport.gets))
+
+        # Different params are a different request
+        self.client.get_meetings_with_teammate('bob')
+        self.client.get_meetings_with_teammate('alice', start_date=datetime.now())
+        self.assertEqual(3, len(self.transport.gets))
+
+    def test_clear_cache(self):
+        self.client.get_me()
+        self.client.clear_cache()
+        self.client.get_me()
+        self.assertEqual(2, len(self.transport.gets))
+
+    def test_concurrent_gets_share_a_request(self):
+        self.transport.release = threading.Event()
+        results = []
+
+        def fetch():
+            results.append(self.client.get_team('manager'))
+
+        threads = [threading.Thread(target=fetch) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        self.transport.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(self.transport.gets))
+        self.assertEqual(5, len(results))
+
+    def test_failures_are_not_remembered(self):
+        self.transport.fail_next = True
+        with self.assertRaises(Exception):
+            self.client.get_me()
+
+        self.assertTrue(self.client.get_me())
+        self.assertEqual(2, len(self.transport.gets))
+
+    def test_writes_invalidate_meetings(self):
+        self.client.get_meetings_with_teammate('alice')
+        self.client.get_me()
+
+        self.client.create_meeting('me', 'alice', datetime.now())
+        self.client.get_meetings_with_teammate('alice')
+        self.assertEqual(3, len(self.transport.gets))
+
+        self.client.share_meeting('123')
+        self.client.get_meetings_with_teammate('alice')
+        self.assertEqual(4, len(self.transport.gets))
+
+        # Unrelated GETs are still remembered
+        self.client.get_me()
+        self.assertEqual(4, len(self.transport.gets))
+
+    def test_requests_have_a_timeout(self):
+        self.client.get_me()
+        self.assertEqual(constants.DEFAULT_TIMEOUT, self.transport.last_timeout)
+
+    def test_deadline_limits_timeouts(self):
+        self.client.deadline = Deadline(2)
+        self.client.get_me()
+        connect_timeout, read_timeout = self.transport.last_timeout
+        self.assertLessEqual(read_timeout, 2)
+        self.assertLessEqual(connect_timeout, 2)
+
+        # Once it runs out, requests fail without being made
+        self.client.deadline = Deadline(0)
+        with self.assertRaises(DeadlineExceeded):
+            self.client.get_team('manager')
+        self.assertEqual(1, len(self.transport.gets))
+
+    def test_iter_meetings_streams_records(self):
+        meetings = list(self.client.iter_meetings_with_teammate('alice'))
+        self.assertEqual(3, len(meetings))
+        self.assertTrue(self.transport.last_response.closed)
+
+        # Streams aren't remembered
+        list(self.client.iter_meetings_with_teammate('alice'))
+        self.assertEqual(2, len(self.transport.gets))
+
+    def test_iter_meetings_can_stop_early(self):
+        meetings = self.client.iter_meetings_with_teammate('alice')
+        self.assertEqual(1, next(meetings)['id'])
+        meetings.close()
+        self.assertTrue(self.transport.last_response.closed)
+
+
+class TestIterJsonChunks(unittest.TestCase):
+    def test_matches_json_dumps(self):
+        pieces = ['<p>Zoë said "hi"</p>', '\\', '\n', '']
+        body = b''.join(iter_json_chunks({'meetingId': 'abc'}, 'content', pieces))
+        self.assertEqual(
+            {'meetingId': 'abc', 'content': ''.join(pieces)}, json.loads(body)
+        )
+
+    def test_batches_pieces(self):
+        pieces = ['x' * 1000] * 200
+        chunks = list(iter_json_chunks({}, 'content', pieces))
+        self.assertLess(len(chunks), 10)
+        self.assertEqual({'content': 'x' * 200000}, json.loads(b''.join(chunks)))
+
+
+class TestIterJsonArray(unittest.TestCase):
+    def chunked(self, data, size):
+        body = json.dumps(data).encode()
+        return [body[start:start + size] for start in range(0, len(body), size)]
+
+    def test_parses_in_any_chunk_size(self):
+        data = [
+            {'name': 'Zoë', 'tricky': '[,]"', 'nested': [1, {'a': None}]},
+            123,
+            4.5e3,
+            -1.25e-7,
+            'text',
+            True,
+            None,
+            {'a': [1.5, 2.75e-3, -0.5, 12e10]},
+            [[4.5], {'b': -1e-07}],
+        ]
+        for size in range(1, 40):
+            self.assertEqual(data, list(iter_json_array(self.chunked(data, size))))
+
+    def test_literals_split_across_chunks(self):
+        chunks = [b'[tr', b'ue, fa', b'lse, nu', b'll, -', b'1, "\\u00', b'e9"]']
+        self.assertEqual([True, False, None, -1, '\u00e9'], list(iter_json_array(chunks)))
+
+    def test_broken_element_fails_without_reading_on(self):
+        read = []
+
+        def chunks():
+            yield b'[{"a": 1}, {"a": oops}, '
+            for index in range(1000):
+                read.append(index)
+                yield b'{"a": 1}, '
+
+        elements = iter_json_array(chunks())
+        self.assertEqual({'a': 1}, next(elements))
+        with self.assertRaises(ValueError):
+            next(elements)
+        self.assertEqual([], read)
+
+    def test_nested_number_split_after_point(self):
+        self.assertEqual([{'a': 4.5}], list(iter_json_array([b'[{"a": 4.', b'5}]'])))
+
+    def test_empty_array(self):
+        self.assertEqual([], list(iter_json_array([b' [ ', b'] '])))
+
+    def test_invalid_json(self):
+        for body in [b'', b'[1,2', b'{"a": 1}', b'[1 2]', b'[1,,2]', b'[1,]', b'[,]']:
+            with self.assertRaises(ValueError):
+                list(iter_json_array([body]))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.client = SIClient('fake_token')
+        self.transport = self.client.transport = FakeTransport()
+        self.client.breaker = TestableCircuitBreaker(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def trip(self):
+        self.transport.down = True
+        for index in range(constants.BREAKER_FAILURE_THRESHOLD):
+            with self.assertRaises(requests.ConnectionError):
+                self.client.get_meetings_with_teammate(f'teammate-{index}')
+
+    def test_trips_after_repeated_failures(self):
+        self.trip()
+        requests_made = len(self.transport.gets)
+
+        with self.assertRaises(CircuitOpenError):
+            self.client.get_me()
+        self.assertEqual(requests_made, len(self.transport.gets))
+
+    def test_state_is_shared_across_runs(self):
+        self.trip()
+
+        # A fresh breaker (like a new invocation) picks up the open state
+        breaker = TestableCircuitBreaker(self.directory)
+        self.assertTrue(breaker.open_until())
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_closes_after_cool_down_and_success(self):
+        self.trip()
+        self.transport.down = False
+        self.client.breaker.state['openUntil'] = time.time() - 1
+
+        self.assertTrue(self.client.get_me())
+        self.assertEqual({}, TestableCircuitBreaker(self.directory).state)
+
+    def test_timeouts_count_as_failures(self):
+        self.transport.timing_out = True
+        for index in range(constants.BREAKER_FAILURE_THRESHOLD):
+            with self.assertRaises(requests.Timeout):
+                self.client.get_meetings_with_teammate(f'teammate-{index}')
+
+        self.assertTrue(self.client.breaker.open_until())
+
+    def test_deadline_timeouts_are_not_failures(self):
+        # Our own budget cut the request short, SI may be fine
+        self.client.deadline = Deadline(5)
+        self.transport.timing_out = True
+        for index in range(constants.BREAKER_FAILURE_THRESHOLD):
+            with self.assertRaises(requests.Timeout):
+                self.client.get_meetings_with_teammate(f'teammate-{index}')
+
+        self.assertFalse(self.client.breaker.open_until())
+
+    def test_success_resets_failures(self):
+        self.transport.down = True
+        with self.assertRaises(requests.ConnectionError):
+            self.client.get_me()
+        self.transport.down = False
+        self.client.get_me()
+
+        self.assertEqual({}, TestableCircuitBreaker(self.directory).state)
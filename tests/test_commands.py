@@ -0,0 +1,270 @@
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+import click
+import requests
+from click.testing import CliRunner
+
+import commands
+import constants
+from records import Teammate
+from small_improvements import MemorySmallImprovements
+from tests.mock_client import MockSIClient
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.si = MemorySmallImprovements('fake_token')
+        self.si.client = MockSIClient()
+        self.si.setup('fake-domain')
+        self.original_si = commands.si
+        commands.si = self.si
+        self.team = self.si.get_manager_and_team()
+
+        self.lookups = []
+        find_upcoming_meeting = self.si.find_upcoming_meeting
+
+        def counting_find_upcoming_meeting(teammate_id):
+            self.lookups.append(teammate_id)
+            return find_upcoming_meeting(teammate_id)
+
+        self.si.find_upcoming_meeting = counting_find_upcoming_meeting
+
+    def tearDown(self):
+        commands.si = self.original_si
+
+    def run_operation(self, operation, meetings=None):
+        return commands.run_batch_operation(
+            operation, self.team, {} if meetings is None else meetings
+        )
+
+    def test_run_batch_operation(self):
+        result = self.run_operation(
+            {'op': 'ap', 'teammates': 'alice,nobody', 'content': 'Hello'}
+        )
+
+        self.assertEqual('add-talking-point', result['op'])
+        self.assertEqual(['nobody'], result['missing'])
+        self.assertEqual(1, len(result['results']))
+        self.assertTrue(result['results'][0]['ok'])
+        self.assertEqual(123, result['results'][0]['meetingId'])
+        self.assertEqual(1, len(self.si.client._talking_points))
+
+    def test_rejects_wrong_types(self):
+        for operation in [
+            {'op': 'an', 'teammates': 3, 'content': 'y'},
+            {'op': 'an', 'teammates': ['alice', 3], 'content': 'y'},
+            {'op': 'an', 'teammates': 'alice', 'content': ['y']},
+            {'op': 'nope', 'teammates': 'alice', 'content': 'y'},
+        ]:
+            with self.assertRaises(click.BadParameter):
+                self.run_operation(operation)
+
+    def test_looks_up_meetings_once_per_teammate(self):
+        meetings = {}
+        self.run_operation({'op': 'ap', 'teammates': 'alice', 'content': 'one'}, meetings)
+        self.run_operation({'op': 'an', 'teammates': 'alice', 'content': 'two'}, meetings)
+        self.run_operation({'op': 'sm', 'teammates': ['alice']}, meetings)
+
+        self.assertEqual(1, len(self.lookups))
+        self.assertEqual([123], self.si.client._shared_meetings)
+
+    def test_reports_each_teammate(self):
+        add_note = self.si.client.add_note
+
+        def flaky_add_note(meeting_id, content, **options):
+            if len(self.si.client._notes):
+                raise requests.ConnectionError('down')
+            add_note(meeting_id, content, **options)
+
+        self.si.client.add_note = flaky_add_note
+        result = self.run_operation({'op': 'an', 'teammates': '2,3', 'content': 'x'})
+
+        self.assertEqual([True, False], [r['ok'] for r in result['results']])
+        self.assertEqual('down', result['results'][1]['error'])
+
+    def test_batch_loads_the_schedule_once(self):
+        schedules = []
+        load_schedule = self.si.load_schedule
+        self.si.load_schedule = lambda: schedules.append(True) or load_schedule()
+
+        lines = [
+            {'op': 'ap', 'teammates': 'all', 'content': 'one'},
+            {'op': 'an', 'teammates': 'all', 'content': 'two'},
+        ]
+        output = CliRunner().invoke(
+            commands.cli, ['batch'], input='\n'.join(json.dumps(line) for line in lines)
+        ).output
+
+        self.assertEqual([True, True], [json.loads(line)['ok'] for line in output.splitlines()])
+        self.assertEqual(1, len(schedules))
+
+    def test_batch_keeps_going_after_bad_lines(self):
+        lines = [
+            {'op': 'an', 'teammates': 3, 'content': 'y'},
+            {'op': 'ap', 'teammates': 'alice', 'content': 'Hello', 'id': 'a'},
+        ]
+        output = CliRunner().invoke(
+            commands.cli,
+            ['batch'],
+            input='\n'.join(json.dumps(line) for line in lines) + '\nnot json\n',
+        ).output
+        results = [json.loads(line) for line in output.splitlines()]
+
+        self.assertEqual([False, True, False], [r['ok'] for r in results])
+        self.assertEqual('a', results[1]['id'])
+        self.assertEqual(3, results[2]['line'])
+
+
+class TestPickTeammates(unittest.TestCase):
+    def setUp(self):
+        self.team = [Teammate(id='0', name='Mona Manager', relationship='manager')] + [
+            Teammate(id=str(i), name=f'Person {i}', relationship='report')
+            for i in range(1, 20)
+        ]
+
+    def pick(self, *keys):
+        with mock.patch('click.getchar', side_effect=list(''.join(keys))), mock.patch(
+            'click.echo'
+        ):
+            return commands.pick_teammates('Who?', self.team)
+
+    def test_picks_highlighted(self):
+        picked, _ = self.pick('person 3', '\r')
+        self.assertEqual(['3'], [t.id for t in picked])
+
+    def test_keywords(self):
+        picked, _ = self.pick('team', '\r')
+        self.assertEqual(19, len(picked))
+        picked, _ = self.pick('manager', '\r')
+        self.assertEqual(['0'], [t.id for t in picked])
+
+    def test_ctrl_a_picks_every_match(self):
+        picked, _ = self.pick('\x01', '\r')
+        self.assertEqual(20, len(picked))
+
+        # Not only the ones on screen
+        picked, _ = self.pick('person 1', '\x01', '\r')
+        self.assertEqual(11, len(picked))
+
+        # Again unpicks them
+        picked, _ = self.pick('\x01', '\x01', 'mona', '\r')
+        self.assertEqual(['0'], [t.id for t in picked])
+
+
+class TestRosterImport(unittest.TestCase):
+    def setUp(self):
+        self.si = MemorySmallImprovements('fake_token')
+        self.si.client = MockSIClient()
+        self.si.setup('fake-domain')
+        self.original_si = commands.si
+        commands.si = self.si
+        self.alice = self.si.get_manager_and_team()[1]
+
+    def tearDown(self):
+        commands.si = self.original_si
+
+    def run_import(self, content):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'team.csv')
+            with open(path, 'wb') as roster_file:
+                roster_file.write(content.encode('utf-8'))
+            return CliRunner().invoke(commands.cli, ['roster', 'import', path])
+
+    def test_excel_byte_order_mark(self):
+        result = self.run_import(f'\ufeffid,nickname\r\n{self.alice.id},Ali\r\n')
+
+        self.assertEqual(0, result.exit_code, result.output)
+        self.assertIn('Updated 1 teammates', result.output)
+        self.assertEqual('Ali', self.si.get_manager_and_team()[1].nickname)
+
+    def test_needs_an_id_column(self):
+        for content in ['', 'name,nickname\r\nAlice Appleton,Ali\r\n']:
+            result = self.run_import(content)
+            self.assertEqual(2, result.exit_code)
+            self.assertIn('including id', result.output)
+
+
+class TestPlan(unittest.TestCase):
+    def setUp(self):
+        self.si = MemorySmallImprovements('fake_token')
+        self.si.client = MockSIClient()
+        self.si.setup('fake-domain')
+        self.original_si = commands.si
+        commands.si = self.si
+
+    def tearDown(self):
+        commands.si = self.original_si
+
+    def test_plan_leaves_a_stale_roster_alone(self):
+        syncs = []
+        self.si.start_background_sync = lambda: syncs.append('background')
+        self.si.sync_team = lambda: syncs.append('now')
+        header = self.si.read_header()
+        header['syncedAt'] = time.time() - 30 * 24 * 3600
+        self.si.write_header(header)
+
+        for command in ['ap', 'an', 'sm']:
+            result = CliRunner().invoke(commands.cli, [command, '--plan', '-t', 'alice'])
+            self.assertEqual(0, result.exit_code, result.output)
+            self.assertIn('Requests:', result.output)
+
+        self.assertEqual([], syncs)
+        self.assertEqual(header, self.si.read_header())
+
+    def test_plan_for_nobody(self):
+        with click.Context(commands.cli), mock.patch('click.echo') as echo:
+            commands.print_plan('share-meeting', [])
+        echo.assert_called_once_with('Nobody to plan for')
+
+
+class TestSpoolStdin(unittest.TestCase):
+    def test_copies_stdin(self):
+        stdin = mock.Mock(buffer=io.BytesIO(b'# Notes\n' * 10000))
+        with mock.patch('sys.stdin', stdin):
+            path = commands.spool_stdin()
+        try:
+            with open(path, 'rb') as spool:
+                self.assertEqual(b'# Notes\n' * 10000, spool.read())
+        finally:
+            os.remove(path)
+
+
+class TestPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.si = MemorySmallImprovements('fake_token')
+        self.si.client = MockSIClient()
+        self.si.setup('fake-domain')
+        self.original_si = commands.si
+        commands.si = self.si
+        self.team = self.si.get_manager_and_team()
+
+    def tearDown(self):
+        commands.si = self.original_si
+
+    def prefetched(self, desired_teammates):
+        return set(commands.prefetch_upcoming_meetings(desired_teammates, self.team))
+
+    def test_prefetches_named_teammates(self):
+        self.assertEqual({self.team[1].id}, self.prefetched(('alice',)))
+
+    def test_prefetches_small_teams(self):
+        self.assertEqual({t.id for t in self.team}, self.prefetched(()))
+
+        with mock.patch.object(constants, 'PREFETCH_TEAM_LIMIT', len(self.team) - 1):
+            self.assertEqual(set(), self.prefetched(()))
+
+    def test_cancels_unpicked(self):
+        futures = {'a': Future(), 'b': Future()}
+        futures['a'].set_result(None)
+
+        commands.cancel_prefetch(futures)
+
+        self.assertFalse(futures['a'].cancelled())
+        self.assertTrue(futures['b'].cancelled())
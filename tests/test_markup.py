@@ -0,0 +1,36 @@
+import io
+import unittest
+
+from markup import iter_lines, iter_markup
+
+
+def to_markup(text):
+    return ''.join(iter_markup(iter_lines(text)))
+
+
+class TestMarkup(unittest.TestCase):
+    def test_iter_lines_matches_split(self):
+        for text in ['', 'one', 'one\ntwo', 'one\n\ntwo\n']:
+            self.assertEqual(text.split('\n'), list(iter_lines(text)))
+
+    def test_plain_lines_are_paragraphs(self):
+        self.assertEqual('<p>one</p><p></p><p>two</p>', to_markup('one\n\ntwo'))
+
+    def test_headings(self):
+        self.assertEqual(
+            '<h1>Title</h1><h3>Sub</h3><p>#hashtag</p>',
+            to_markup('# Title #\n### Sub\n#hashtag'),
+        )
+
+    def test_lists(self):
+        self.assertEqual(
+            '<ul><li>a</li><li>b</li></ul><ol><li>c</li><li>d</li></ol><p>e</p>',
+            to_markup('- a\n* b\n1. c\n2) d\ne'),
+        )
+
+    def test_list_closed_at_end(self):
+        self.assertEqual('<p>x</p><ul><li>a</li></ul>', to_markup('x\n+ a'))
+
+    def test_file_lines(self):
+        note = io.StringIO('# Notes\r\n- one\r\n')
+        self.assertEqual('<h1>Notes</h1><ul><li>one</li></ul>', ''.join(iter_markup(note)))
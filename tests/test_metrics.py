@@ -0,0 +1,125 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import constants
+from metrics import (
+    FileBackedMetricsStore,
+    Recorder,
+    endpoint_name,
+    estimate_duration,
+    new_histogram,
+    observe,
+    percentile,
+    to_openmetrics,
+)
+
+
+class TestableMetricsStore(FileBackedMetricsStore):
+    def __init__(self, directory):
+        self.directory = directory
+
+    @property
+    def LOCAL_FILE(self):
+        return self.directory + '/metrics'
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = TestableMetricsStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_endpoint_name(self):
+        self.assertEqual(
+            'GET /meetings',
+            endpoint_name('GET', 'https://x.com/api/v2/meetings?participants=abc'),
+        )
+        self.assertEqual(
+            'POST /meetings/{id}/notes',
+            endpoint_name('POST', 'https://x.com/api/v2/meetings/abc123/notes'),
+        )
+
+    def test_percentile(self):
+        histogram = new_histogram()
+        self.assertIsNone(percentile(histogram, 0.5))
+
+        for _ in range(90):
+            observe(histogram, 0.02)
+        for _ in range(10):
+            observe(histogram, 0.7)
+
+        self.assertEqual(0.025, percentile(histogram, 0.5))
+        self.assertEqual(1, percentile(histogram, 0.95))
+
+        # Too slow for any bucket
+        observe(histogram, 100)
+        self.assertIsNone(percentile(histogram, 1))
+
+    def test_estimate_duration(self):
+        summary = {
+            'endpoint': {'GET /meetings': new_histogram(), 'POST /meetings': new_histogram()}
+        }
+        observe(summary['endpoint']['GET /meetings'], 0.2)
+        observe(summary['endpoint']['GET /meetings'], 0.4)
+        observe(summary['endpoint']['POST /meetings'], 1)
+
+        chains = [['GET /meetings', 'POST /meetings']] + [['GET /meetings']] * 20
+        seconds, unknown = estimate_duration(chains, summary, workers=2)
+        # Spread across the workers
+        self.assertAlmostEqual((1.3 + 20 * 0.3) / 2, seconds)
+        self.assertEqual([], unknown)
+
+        # Never quicker than the longest chain
+        seconds, _ = estimate_duration(chains[:2], summary, workers=8)
+        self.assertAlmostEqual(1.3, seconds)
+
+        seconds, unknown = estimate_duration([['PATCH /meetings/{id}']], summary, 8)
+        self.assertEqual(0, seconds)
+        self.assertEqual(['PATCH /meetings/{id}'], unknown)
+
+    def test_recorder_flushes_to_store(self):
+        recorder = Recorder(self.store)
+        recorder.observe('command', 'add-note', 0.3)
+        recorder.observe('endpoint', 'GET /meetings', 0.1)
+        recorder.flush()
+        recorder.observe('command', 'add-note', 0.4)
+        recorder.flush()
+
+        summary = self.store.summarize()
+        self.assertEqual(2, sum(summary['command']['add-note']['counts']))
+        self.assertEqual(1, sum(summary['endpoint']['GET /meetings']['counts']))
+
+    def test_store_drops_old_days(self):
+        histogram = new_histogram()
+        observe(histogram, 0.1)
+        old = datetime.now() - timedelta(days=constants.METRICS_RETENTION_DAYS + 1)
+        self.store.add({'command': {'old': histogram}}, today=old)
+        self.store.add({'command': {'new': histogram}})
+
+        self.assertEqual(['new'], list(self.store.summarize()['command']))
+        self.assertEqual(1, len(self.store.read_days()))
+
+    def test_missing_store_is_empty(self):
+        self.assertEqual({}, self.store.read_days())
+        self.assertFalse(os.path.exists(self.store.LOCAL_FILE))
+
+    def test_openmetrics(self):
+        histogram = new_histogram()
+        observe(histogram, 0.1)
+        text = to_openmetrics({'command': {'add-note': histogram}, 'endpoint': {}})
+
+        self.assertIn(
+            'small_improvements_command_duration_seconds_bucket'
+            '{command="add-note",le="0.1"} 1',
+            text,
+        )
+        self.assertIn(
+            'small_improvements_command_duration_seconds_count{command="add-note"} 1',
+            text,
+        )
+        self.assertTrue(text.endswith('# EOF\n'))
@@ -0,0 +1,49 @@
+import unittest
+
+from records import Meeting, Teammate
+
+
+class TestRecords(unittest.TestCase):
+    def test_round_trips_json(self):
+        data = {
+            'id': 'abc',
+            'name': 'Alice Appleton',
+            'firstName': 'Alice',
+            'relationship': 'report',
+        }
+        teammate = Teammate.from_json(data)
+
+        self.assertEqual('Alice', teammate.firstName)
+        self.assertIsNone(teammate.nickname)
+        self.assertEqual(data, teammate.to_json())
+
+    def test_keeps_unknown_keys(self):
+        teammate = Teammate.from_json({'id': 'abc', 'favoriteColor': 'blue'})
+
+        self.assertEqual('blue', teammate['favoriteColor'])
+        self.assertEqual({'id': 'abc', 'favoriteColor': 'blue'}, teammate.to_json())
+
+    def test_acts_like_a_dict(self):
+        teammate = Teammate(id='abc', name='Alice Appleton')
+
+        self.assertIn('id', teammate)
+        self.assertNotIn('nickname', teammate)
+        self.assertEqual('', teammate.get('nickname', ''))
+        with self.assertRaises(KeyError):
+            teammate['nickname']
+
+        teammate['nickname'] = 'Ali'
+        self.assertEqual('Ali', teammate.nickname)
+
+    def test_equality(self):
+        meeting = Meeting(id=123, calendarDate='2020-01-01')
+
+        self.assertEqual(meeting, {'id': 123, 'calendarDate': '2020-01-01'})
+        self.assertEqual(meeting, Meeting.from_json(meeting.to_json()))
+        self.assertNotEqual(meeting, Meeting(id=456, calendarDate='2020-01-01'))
+
+    def test_hashable(self):
+        alice = Teammate(id='1', name='Alice')
+
+        self.assertEqual(1, len({alice, Teammate(id='1', name='Alice')}))
+        self.assertEqual('picked', {alice: 'picked'}[Teammate(id='1', name='Alice')])
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from scheduling import (
+    compute_cadence,
+    from_ordinal,
+    load_holidays,
+    next_business_days,
+    next_meeting_day,
+    next_meeting_days,
+    to_ordinal,
+)
+
+
+def day(calendar_date):
+    return to_ordinal(calendar_date)
+
+
+class TestScheduling(unittest.TestCase):
+    def test_to_and_from_ordinal(self):
+        self.assertEqual(date(2020, 3, 1).toordinal(), to_ordinal('2020-03-01'))
+        self.assertEqual('2020-03-01', from_ordinal(to_ordinal('2020-03-01')))
+        self.assertIsNone(from_ordinal(None))
+
+    def test_compute_cadence(self):
+        today = day('2020-03-20')
+        stats = compute_cadence(
+            {
+                'regular': [day('2020-03-05'), day('2020-03-12'), day('2020-03-26')],
+                'lapsed': [day('2020-02-01'), day('2020-02-15')],
+                'never': [],
+                'today': [day('2020-03-13'), day('2020-03-20')],
+            },
+            today,
+        )
+
+        self.assertEqual('2020-03-12', stats['regular']['lastMeeting'])
+        self.assertEqual('2020-03-26', stats['regular']['nextMeeting'])
+        self.assertEqual(8, stats['regular']['daysSinceLast'])
+        self.assertEqual(6, stats['regular']['daysUntilNext'])
+        self.assertEqual(7, stats['regular']['averageGap'])
+        self.assertFalse(stats['regular']['overdue'])
+
+        self.assertEqual(14, stats['lapsed']['averageGap'])
+        self.assertTrue(stats['lapsed']['overdue'])
+
+        self.assertIsNone(stats['never']['lastMeeting'])
+        self.assertTrue(stats['never']['overdue'])
+
+        # A meeting today counts as the next one
+        self.assertEqual('2020-03-20', stats['today']['nextMeeting'])
+        self.assertFalse(stats['today']['overdue'])
+
+    def test_compute_cadence_expected_gaps(self):
+        today = day('2020-03-20')
+        meetings = {'biweekly': [day('2020-03-10')]}
+
+        self.assertTrue(compute_cadence(meetings, today)['biweekly']['overdue'])
+        self.assertFalse(
+            compute_cadence(meetings, today, expected_gaps={'biweekly': 14})[
+                'biweekly'
+            ]['overdue']
+        )
+
+    def test_next_business_days(self):
+        holidays = {day('2020-03-09')}
+        # Friday stays put, the weekend and Monday's holiday move to Tuesday
+        days = ['2020-03-06', '2020-03-07', '2020-03-08', '2020-03-09']
+        expected = ['2020-03-06', '2020-03-10', '2020-03-10', '2020-03-10']
+        self.assertEqual(
+            [day(d) for d in expected],
+            next_business_days([day(d) for d in days], holidays),
+        )
+        self.assertEqual([], next_business_days([], holidays))
+
+    def test_next_meeting_days(self):
+        today = day('2020-03-11')  # A Wednesday
+        self.assertEqual(
+            [
+                day('2020-03-12'),  # Never met, so tomorrow
+                day('2020-03-16'),  # Weekly from a Saturday lands on a Saturday
+                day('2020-03-20'),  # Biweekly
+                day('2020-03-11'),  # Overdue, so as soon as possible
+            ],
+            next_meeting_days(
+                [None, day('2020-03-07'), day('2020-03-06'), day('2020-01-01')],
+                [7, 7, 14, 7],
+                today,
+                set(),
+            ),
+        )
+
+    def test_load_holidays(self):
+        with tempfile.NamedTemporaryFile('w', suffix='holidays', delete=False) as f:
+            f.write('# Holidays\n2020-12-25\n\n2020-12-26  # Boxing day\n')
+        try:
+            self.assertEqual(
+                {day('2020-12-25'), day('2020-12-26')}, load_holidays(f.name)
+            )
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(set(), load_holidays('/does/not/exist'))
+
+    def test_load_holidays_skips_bad_lines(self):
+        with tempfile.NamedTemporaryFile('w', suffix='holidays', delete=False) as f:
+            f.write('2020-1-5\n2020-12-25\nchristmas\n')
+        try:
+            self.assertEqual({day('2020-12-25')}, load_holidays(f.name))
+        finally:
+            os.remove(f.name)
+
+    def test_next_meeting_day_matches_bulk(self):
+        holidays = {day('2020-12-25')}
+        today = day('2020-12-21')
+        cases = [(None, 7), (day('2020-12-18'), 7), (day('2020-12-01'), 14)]
+        for last_day, cadence in cases:
+            self.assertEqual(
+                next_meeting_days([last_day], [cadence], today, holidays)[0],
+                next_meeting_day(last_day, cadence, today, holidays),
+            )
@@ -1,6 +1,12 @@
+import pathlib
+import tempfile
+import time
 import unittest
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 
+import requests
+
 from constants import DATE_FORMAT
 from small_improvements import MemorySmallImprovements
 from tests.mock_client import MockSIClient
@@ -30,6 +36,25 @@ class TestSmallImprovements(unittest.TestCase):
         raw_data = self.si.read_data()
         self.assertNotIn('some_crazy_key', raw_data['me'])
 
+    def test_sync_team_keeps_writes_made_while_fetching(self):
+        iter_team = self.si.client.iter_team
+
+        def slow_iter_team(manager_id):
+            # Somebody nicknames Alice and a meeting is remembered while the
+            # roster is still coming back from SI
+            alice = self.si.get_team()['Alice Appleton']
+            self.si.add_nickname(alice, 'Ali')
+            self.si.remember_meetings(
+                {alice.id: {'id': 'm1', 'calendarDate': '2099-01-01'}}
+            )
+            yield from iter_team(manager_id)
+
+        self.si.client.iter_team = slow_iter_team
+        self.si.sync_team()
+
+        self.assertEqual('Ali', self.si.get_team()['Alice Appleton'].nickname)
+        self.assertIn('m1', str(self.si.read_shard('meetings')))
+
     def test_get_me(self):
         self.assertIn('id', self.si.get_me())
 
@@ -45,6 +70,14 @@ class TestSmallImprovements(unittest.TestCase):
         # from UX standpoint memorizing #1 is manager is easier)
         self.assertEqual('manager', team[0]['relationship'])
 
+    def test_no_manager(self):
+        header = self.si.read_header()
+        del header['manager']
+        self.si.write_header(header)
+
+        self.assertIsNone(self.si.get_manager())
+        self.assertEqual(2, len(self.si.get_manager_and_team()))
+
     def test_add_nickname(self):
         team = self.si.get_team()
         self.si.add_nickname(team['Alice Appleton'], 'Ali')
@@ -52,35 +85,160 @@ class TestSmallImprovements(unittest.TestCase):
         team = self.si.get_team()
         self.assertEqual('Ali', team['Alice Appleton'].get('nickname'))
 
+    def test_import_roster(self):
+        team = self.si.get_team()
+        alice = team['Alice Appleton']
+        bob = next(teammate for teammate in team.values() if teammate is not alice)
+
+        updated, unknown_ids = self.si.import_roster(
+            [
+                {'id': alice.id, 'nickname': 'Ali', 'hidden': '', 'cadence': 'Biweekly'},
+                {'id': bob.id, 'hidden': 'yes'},
+                {'id': 'nobody', 'nickname': 'Ghost'},
+            ]
+        )
+        self.assertEqual(2, updated)
+        self.assertEqual(['nobody'], unknown_ids)
+
+        team = self.si.get_team()
+        self.assertEqual('Ali', team['Alice Appleton'].nickname)
+        self.assertEqual('biweekly', team['Alice Appleton'].cadence)
+        self.assertNotIn(bob.id, [t.id for t in self.si.get_manager_and_team()])
+
+        # Empty cells clear settings, missing columns leave them alone
+        self.si.import_roster([{'id': alice.id, 'nickname': ''}, {'id': bob.id, 'hidden': ''}])
+        team = self.si.get_team()
+        self.assertIsNone(team['Alice Appleton'].nickname)
+        self.assertEqual('biweekly', team['Alice Appleton'].cadence)
+        self.assertIn(bob.id, [t.id for t in self.si.get_manager_and_team()])
+
+    def test_import_roster_is_all_or_nothing(self):
+        alice = self.si.get_team()['Alice Appleton']
+
+        with self.assertRaises(ValueError):
+            self.si.import_roster(
+                [{'id': alice.id, 'nickname': 'Ali'}, {'id': alice.id, 'cadence': 'daily'}]
+            )
+        self.assertIsNone(self.si.get_team()['Alice Appleton'].nickname)
+
+    def test_export_roster(self):
+        alice = self.si.get_team()['Alice Appleton']
+        self.si.import_roster([{'id': alice.id, 'nickname': 'Ali', 'hidden': 'x'}])
+
+        rows = {row['id']: row for row in self.si.export_roster()}
+        self.assertEqual(
+            {
+                'id': alice.id,
+                'name': 'Alice Appleton',
+                'nickname': 'Ali',
+                'hidden': 'yes',
+                'cadence': '',
+            },
+            rows[alice.id],
+        )
+
+    def test_plan_requests(self):
+        team = self.si.get_team()
+        alice = team['Alice Appleton']
+        bob = next(teammate for teammate in team.values() if teammate is not alice)
+        future = (datetime.now() + timedelta(days=3)).strftime(DATE_FORMAT)
+        self.si.remember_meetings({alice.id: {'id': 'm1', 'calendarDate': future}})
+
+        shard_reads = []
+        read_shard = self.si.read_shard
+        self.si.read_shard = lambda shard: shard_reads.append(shard) or read_shard(shard)
+        plans = self.si.plan_requests([alice.id, bob.id], 'add-talking-point', 2)
+        self.assertEqual(['meetings'], shard_reads)
+        self.assertEqual('m1', plans[alice.id]['meeting'].id)
+        self.assertIsNone(plans[bob.id]['meeting'])
+
+        def endpoints(plan, expected=True):
+            return [r['endpoint'] for r in plan['requests'] if r['expected'] or not expected]
+
+        # Creating a meeting is only expected without one in the cache
+        self.assertEqual(
+            ['GET /meetings'] + ['POST /meetings/{id}/talkingpoints'] * 2,
+            endpoints(plans[alice.id]),
+        )
+        self.assertEqual(5, len(endpoints(plans[bob.id])))
+        self.assertEqual(5, len(endpoints(plans[alice.id], expected=False)))
+
+        plans = self.si.plan_requests([alice.id, bob.id], 'share-meeting')
+        self.assertEqual(['GET /meetings', 'PATCH /meetings/{id}'], endpoints(plans[alice.id]))
+        self.assertEqual(['GET /meetings'], endpoints(plans[bob.id]))
+
+        # Nothing was actually sent
+        self.assertEqual([], self.si.client._talking_points)
+        self.assertEqual([], self.si.client._shared_meetings)
+
+    def next_weekday(self, date):
+        while date.weekday() >= 5:
+            date += timedelta(days=1)
+        return date
+
     def test_find_or_create_meeting(self):
         alice = self.si.get_team()['Alice Appleton']
 
-        # Without any meetings, should create one for tomorrow
+        # Without any meetings, should create one for the next business day
         now = datetime.now()
         meeting = self.si.find_or_create_meeting(alice['id'])
         self.assertIn('id', meeting)
-        tomorrow = now + timedelta(days=1)
+        tomorrow = self.next_weekday(now + timedelta(days=1))
         self.assertEqual(
             meeting['calendarDate'],
             tomorrow.strftime(DATE_FORMAT),
-            'Meeting was not for tomorrow',
+            'Meeting was not for the next business day',
         )
 
         # If we call it again, should get the upcoming meeting back
         self.si.client._set_meetings([meeting])
         self.assertEqual(meeting, self.si.find_or_create_meeting(alice['id']))
 
-        # If we have an old meeting to go off of, should create the new one 7 days from then
+        # If we have an old meeting to go off of, should create the new one 7 days
+        # from then (or the business day after)
         meeting['calendarDate'] = now - timedelta(days=3)
         self.si.client._set_meetings([meeting])
         meeting = self.si.find_or_create_meeting(alice['id'])
-        expected_date = now + timedelta(days=4)
+        expected_date = self.next_weekday(now + timedelta(days=4))
         self.assertEqual(
             meeting['calendarDate'],
             expected_date.strftime(DATE_FORMAT),
             'Meeting was not 7 days in future',
         )
 
+    def test_create_next_meeting_follows_cadence_and_holidays(self):
+        alice = self.si.get_team()['Alice Appleton']
+        self.si.set_cadence(alice, 'biweekly')
+        self.assertEqual({alice['id']: 'biweekly'}, self.si.get_team_cadences())
+
+        now = datetime.now()
+        self.si.client._set_meetings(
+            [{'id': 1, 'calendarDate': now - timedelta(days=10)}]
+        )
+        expected_date = self.next_weekday(now + timedelta(days=4))
+        self.si._holidays = {expected_date.date().toordinal()}
+
+        meeting = self.si.create_next_meeting(alice['id'])
+        self.assertEqual(
+            self.next_weekday(expected_date + timedelta(days=1)).strftime(DATE_FORMAT),
+            meeting['calendarDate'],
+        )
+
+        with self.assertRaises(ValueError):
+            self.si.set_cadence(alice, 'hourly')
+
+    def test_create_next_meeting(self):
+        alice = self.si.get_team()['Alice Appleton']
+        now = datetime.now()
+
+        # Creates even if there is an upcoming meeting, since the caller
+        # has already decided one is needed
+        upcoming = {'id': 456, 'calendarDate': now + timedelta(days=1)}
+        self.si.client._set_meetings([upcoming])
+        meeting = self.si.create_next_meeting(alice['id'], is_draft=True)
+        self.assertEqual(123, meeting['id'])
+        self.assertTrue(meeting['isDraft'])
+
     def test_find_upcoming_meeting(self):
         teammate = self.si.get_team()['Alice Appleton']
         now = datetime.now()
@@ -111,3 +269,236 @@ class TestSmallImprovements(unittest.TestCase):
         self.si.add_note(123, 'test', note_options={'is_private': True})
 
         self.assertEqual(self.si.client._last_note['kwargs']['visibility'], 'PRIVATE')
+
+    def test_typed_text_is_not_markdown(self):
+        self.si.add_talking_point(123, '3. Q3 numbers are in')
+        self.assertEqual(
+            '<p>3. Q3 numbers are in</p>', self.si.client._last_talking_point['args'][1]
+        )
+
+        self.si.add_note(123, '# 1 priority\n- tbd')
+        self.assertEqual('<p># 1 priority</p><p>- tbd</p>', self.si.client._last_note['args'][1])
+
+    def test_add_note_from_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / 'note.md'
+            path.write_text('# Agenda\n- one\n- two\nThanks\n')
+            self.si.add_note(123, path)
+
+        self.assertEqual(
+            '<h1>Agenda</h1><ul><li>one</li><li>two</li></ul><p>Thanks</p>',
+            self.si.client._last_note['args'][1],
+        )
+
+    def test_add_talking_points(self):
+        team = self.si.get_team()
+        alice = team['Alice Appleton']
+        robert = team['Robert Rogers']
+
+        results = self.si.add_talking_points(
+            {alice['id']: ['one', 'two'], robert['id']: ['three']},
+            talking_point_options={'is_private': True},
+        )
+
+        for future in results[alice['id']] + results[robert['id']]:
+            self.assertEqual(123, future.result()['id'])
+
+        contents = sorted(tp['args'][1] for tp in self.si.client._talking_points)
+        self.assertEqual(['<p>one</p>', '<p>three</p>', '<p>two</p>'], contents)
+
+        # A teammate's talking points arrive in the order given
+        contents = [tp['args'][1] for tp in self.si.client._talking_points]
+        self.assertLess(contents.index('<p>one</p>'), contents.index('<p>two</p>'))
+        for talking_point in self.si.client._talking_points:
+            self.assertEqual('PRIVATE', talking_point['kwargs']['visibility'])
+
+    def test_bulk_creation_loads_schedule_once(self):
+        loads = []
+        load_schedule = self.si.load_schedule
+
+        def counting_load_schedule():
+            loads.append(1)
+            return load_schedule()
+
+        self.si.load_schedule = counting_load_schedule
+        team = self.si.get_team()
+        results = self.si.add_talking_points(
+            {teammate.id: ['hello'] for teammate in team.values()}
+        )
+        for futures in results.values():
+            for future in futures:
+                future.result()
+
+        self.assertEqual(1, len(loads))
+        self.assertEqual(2, len(self.si.client._talking_points))
+
+    def test_add_notes(self):
+        alice = self.si.get_team()['Alice Appleton']
+
+        results = self.si.add_notes({alice['id']: ['note']})
+
+        self.assertEqual(123, results[alice['id']][0].result()['id'])
+        self.assertEqual(1, len(self.si.client._notes))
+
+    def test_share_meetings(self):
+        alice = self.si.get_team()['Alice Appleton']
+        robert = self.si.get_team()['Robert Rogers']
+
+        # Nobody has an upcoming meeting, so nothing gets shared
+        results = self.si.share_meetings([alice['id'], robert['id']])
+        self.assertIsNone(results[alice['id']].result())
+        self.assertEqual([], self.si.client._shared_meetings)
+
+        meeting = {'id': 456, 'calendarDate': datetime.now() + timedelta(days=1)}
+        self.si.client._set_meetings([meeting])
+
+        # Duplicates are only shared once
+        results = self.si.share_meetings([alice['id'], alice['id']])
+        self.assertEqual(1, len(results))
+        self.assertEqual(meeting, results[alice['id']].result())
+        self.assertEqual([456], self.si.client._shared_meetings)
+
+    def test_bulk_calls_start_fresh(self):
+        # A long lived SmallImprovements shouldn't serve GETs from hours ago
+        alice = self.si.get_team()['Alice Appleton']
+        clears = self.si.client._cache_clears
+
+        self.si.find_upcoming_meetings([alice.id])
+        self.si.find_or_create_meetings([alice.id])
+        self.si.add_talking_points({alice.id: ['Hi']})
+        self.si.get_cadence()
+        self.si.sync_team()
+
+        self.assertEqual(clears + 5, self.si.client._cache_clears)
+
+    def test_find_upcoming_meetings(self):
+        alice = self.si.get_team()['Alice Appleton']
+
+        results = self.si.find_upcoming_meetings([alice['id']])
+        self.assertIsNone(results[alice['id']].result())
+
+    def count_lookups(self):
+        lookups = []
+        get_meetings = self.si.client.get_meetings_with_teammate
+
+        def counting_get_meetings(teammate_id, start_date=None, end_date=None):
+            lookups.append(teammate_id)
+            return get_meetings(teammate_id, start_date, end_date)
+
+        self.si.client.get_meetings_with_teammate = counting_get_meetings
+        return lookups
+
+    def test_find_or_create_meetings_reuses_prefetch(self):
+        alice = self.si.get_team()['Alice Appleton']
+        upcoming = {'id': 456, 'calendarDate': datetime.now() + timedelta(days=1)}
+        self.si.client._set_meetings([upcoming])
+        lookups = self.count_lookups()
+
+        prefetched = self.si.find_upcoming_meetings([alice.id])
+        results = self.si.find_or_create_meetings(
+            [alice.id], upcoming_meetings=prefetched
+        )
+
+        self.assertEqual(456, results[alice.id].result().id)
+        self.assertEqual([alice.id], lookups)
+
+    def test_find_or_create_meetings_retries_failed_prefetch(self):
+        alice = self.si.get_team()['Alice Appleton']
+        robert = self.si.get_team()['Robert Rogers']
+        upcoming = {'id': 456, 'calendarDate': datetime.now() + timedelta(days=1)}
+        self.si.client._set_meetings([upcoming])
+        lookups = self.count_lookups()
+
+        failed = Future()
+        failed.set_exception(requests.ConnectionError('down'))
+        cancelled = Future()
+        cancelled.cancel()
+        results = self.si.find_or_create_meetings(
+            [alice.id, robert.id],
+            upcoming_meetings={alice.id: failed, robert.id: cancelled},
+        )
+
+        self.assertEqual(456, results[alice.id].result().id)
+        self.assertEqual(456, results[robert.id].result().id)
+        self.assertEqual({alice.id, robert.id}, set(lookups))
+
+    def test_get_cadence(self):
+        now = datetime.now()
+        self.si.client._set_meetings(
+            [
+                {'id': 1, 'calendarDate': now - timedelta(days=20)},
+                {'id': 2, 'calendarDate': now - timedelta(days=13)},
+            ]
+        )
+
+        report = self.si.get_cadence()
+
+        self.assertEqual(2, len(report))
+        stats = report[0]['stats']
+        self.assertEqual(13, stats['daysSinceLast'])
+        self.assertEqual(7, stats['averageGap'])
+        self.assertIsNone(stats['nextMeeting'])
+        self.assertTrue(stats['overdue'])
+        self.assertIsNotNone(stats['suggestedNext'])
+        self.assertIsNone(report[0]['error'])
+
+    def test_remember_meetings(self):
+        alice = self.si.get_team()['Alice Appleton']
+        robert = self.si.get_team()['Robert Rogers']
+        now = datetime.now()
+
+        self.assertIsNone(self.si.get_remembered_meeting(alice['id']))
+
+        tomorrow = (now + timedelta(days=1)).strftime(DATE_FORMAT)
+        yesterday = (now - timedelta(days=1)).strftime(DATE_FORMAT)
+        upcoming = {'id': 456, 'calendarDate': tomorrow}
+        past = {'id': 123, 'calendarDate': yesterday}
+        self.si.remember_meetings({alice['id']: upcoming, robert['id']: past})
+
+        self.assertEqual(upcoming, self.si.get_remembered_meeting(alice['id']))
+        # Meetings that have already happened aren't upcoming anymore
+        self.assertIsNone(self.si.get_remembered_meeting(robert['id']))
+
+    def test_remember_meetings_keeps_only_id_and_date(self):
+        alice = self.si.get_team()['Alice Appleton']
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime(DATE_FORMAT)
+        self.si.remember_meetings(
+            {
+                alice.id: {
+                    'id': 456,
+                    'calendarDate': tomorrow,
+                    'isDraft': False,
+                    'talkingPoints': [{'content': 'Private', 'visibility': 'PRIVATE'}],
+                }
+            }
+        )
+
+        self.assertEqual(
+            {alice.id: {'id': 456, 'calendarDate': tomorrow}},
+            self.si.read_shard('meetings'),
+        )
+
+    def test_get_manager_and_team_refreshes_stale_roster(self):
+        background_syncs = []
+        self.si.start_background_sync = lambda: background_syncs.append(True)
+
+        # Freshly synced, nothing to do
+        self.si.get_manager_and_team()
+        self.assertEqual(0, len(background_syncs))
+
+        # Stale, so a sync is kicked off, but only once while it runs
+        header = self.si.read_header()
+        header['syncedAt'] = time.time() - 2 * 24 * 3600
+        self.si.write_header(header)
+        self.assertEqual(3, len(self.si.get_manager_and_team()))
+        self.si.get_manager_and_team()
+        self.assertEqual(1, len(background_syncs))
+
+    def test_get_manager_and_team_syncs_very_old_roster(self):
+        header = self.si.read_header()
+        header['syncedAt'] = 0
+        header['rosterMaxAgeHours'] = 1
+        self.si.write_header(header)
+
+        self.si.get_manager_and_team()
+        self.assertGreater(self.si.read_header()['syncedAt'], time.time() - 60)
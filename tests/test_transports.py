@@ -0,0 +1,148 @@
+import sys
+import types
+import unittest
+from unittest import mock
+
+import requests
+
+import constants
+from transports import HTTP2Transport, RequestsTransport, get_transport
+
+
+def fake_httpx(fail_with=None, status_code=200, chunks=(b'[]',)):
+    '''
+    Just enough of httpx for HTTP2Transport. fail_with names the exception
+    (TimeoutException or TransportError) sending or streaming raises
+    '''
+    httpx = types.ModuleType('httpx')
+
+    class TransportError(Exception):
+        pass
+
+    class TimeoutException(TransportError):
+        pass
+
+    class Timeout(object):
+        def __init__(self, timeout, connect=None):
+            self.read = timeout
+            self.connect = connect
+
+    class Response(object):
+        url = 'https://si.example/api/v2/users/me'
+
+        def __init__(self):
+            self.status_code = status_code
+
+        def iter_bytes(self, chunk_size=None):
+            yield from chunks
+            if fail_with:
+                raise getattr(httpx, fail_with)('stream broke')
+
+        def json(self):
+            return []
+
+        def close(self):
+            pass
+
+    class Client(object):
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+            self.sent = []
+
+        def build_request(self, method, url, **kwargs):
+            return dict(kwargs, method=method, url=url)
+
+        def send(self, request, stream=False):
+            self.sent.append(request)
+            if fail_with and not stream:
+                raise getattr(httpx, fail_with)('send failed')
+            return Response()
+
+    httpx.TransportError = TransportError
+    httpx.TimeoutException = TimeoutException
+    httpx.Timeout = Timeout
+    httpx.Client = Client
+    return httpx
+
+
+class TestGetTransport(unittest.TestCase):
+    def test_unknown_name_falls_back(self):
+        with mock.patch('click.echo') as echo:
+            transport = get_transport('carrier-pigeon', {})
+
+        self.assertIsInstance(transport, RequestsTransport)
+        self.assertIn('Unknown transport carrier-pigeon', echo.call_args[0][0])
+
+    def test_missing_dependency_falls_back(self):
+        # None in sys.modules makes `import httpx` raise ImportError
+        with mock.patch.dict(sys.modules, {'httpx': None}), mock.patch('click.echo') as echo:
+            transport = get_transport('http2', {})
+
+        self.assertIsInstance(transport, RequestsTransport)
+        self.assertIn('not installed', echo.call_args[0][0])
+
+    def test_default(self):
+        with mock.patch.object(constants, 'DEFAULT_TRANSPORT', 'http1'):
+            self.assertIsInstance(get_transport(None, {}), RequestsTransport)
+
+    def test_http2(self):
+        with mock.patch.dict(sys.modules, {'httpx': fake_httpx()}):
+            transport = get_transport('http2', {'Accept': 'application/json'})
+
+        self.assertIsInstance(transport, HTTP2Transport)
+        self.assertEqual(
+            {'http1': True, 'http2': True, 'headers': {'Accept': 'application/json'}},
+            transport.client.kwargs,
+        )
+
+
+class TestHTTP2Transport(unittest.TestCase):
+    def transport(self, **kwargs):
+        with mock.patch.dict(sys.modules, {'httpx': fake_httpx(**kwargs)}):
+            return HTTP2Transport({})
+
+    def test_prior_knowledge_skips_http1(self):
+        with mock.patch.dict(sys.modules, {'httpx': fake_httpx()}):
+            transport = HTTP2Transport({}, prior_knowledge=True)
+        self.assertFalse(transport.client.kwargs['http1'])
+
+    def test_timeouts_are_split(self):
+        transport = self.transport()
+        transport.request('GET', 'https://si.example', timeout=(3, 10))
+
+        timeout = transport.client.sent[0]['timeout']
+        self.assertEqual((3, 10), (timeout.connect, timeout.read))
+
+    def test_errors_look_like_requests_ones(self):
+        transport = self.transport(fail_with='TimeoutException')
+        with self.assertRaises(requests.Timeout):
+            transport.request('GET', 'https://si.example')
+
+        transport = self.transport(fail_with='TransportError')
+        with self.assertRaises(requests.ConnectionError) as raised:
+            transport.request('GET', 'https://si.example')
+        # The breaker counts these as SI being down, not as our deadline
+        self.assertNotIsInstance(raised.exception, requests.Timeout)
+
+    def test_streaming_errors_look_like_requests_ones(self):
+        for fail_with, expected in [
+            ('TimeoutException', requests.Timeout),
+            ('TransportError', requests.ConnectionError),
+        ]:
+            response = self.transport(fail_with=fail_with).request(
+                'GET', 'https://si.example', stream=True
+            )
+            chunks = response.iter_content()
+            self.assertEqual(b'[]', next(chunks))
+            with self.assertRaises(expected):
+                next(chunks)
+
+    def test_raise_for_status(self):
+        response = self.transport().request('GET', 'https://si.example')
+        response.raise_for_status()
+
+        response = self.transport(status_code=503).request('GET', 'https://si.example')
+        with self.assertRaises(requests.HTTPError) as raised:
+            response.raise_for_status()
+        self.assertIs(response, raised.exception.response)
+        self.assertIn('503 Error for url: https://si.example', str(raised.exception))
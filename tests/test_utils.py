@@ -1,11 +1,18 @@
 import unittest
 
-from utils import match_choices_to_teammates
+from records import Teammate
+from utils import (
+    TeammateIndex,
+    match_choices_to_teammates,
+    parse_duration,
+    score_match,
+    search_key,
+)
 
 
 class TestUtils(unittest.TestCase):
     def generate_team(self):
-        return [{'name': 'Alice'}, {'name': 'Bob'}, {'name': 'Charlie'}]
+        return [Teammate(name='Alice'), Teammate(name='Bob'), Teammate(name='Charlie')]
 
     def test_match_choices_to_teammates(self):
         team = self.generate_team()
@@ -118,3 +125,65 @@ class TestUtils(unittest.TestCase):
 
         found, missing = match_choices_to_teammates(['Alice'], team)
         self.assertEqual(1, len(found))
+
+        # Keywords work on their own, like `-t team`
+        found, missing = match_choices_to_teammates(['all'], team)
+        self.assertEqual(3, len(found))
+
+    def test_parse_duration(self):
+        self.assertEqual(10, parse_duration('10s'))
+        self.assertEqual(10, parse_duration('10'))
+        self.assertEqual(0.5, parse_duration('500ms'))
+        self.assertEqual(120, parse_duration('2m'))
+        self.assertEqual(5400, parse_duration('1.5h'))
+
+        with self.assertRaises(ValueError):
+            parse_duration('soon')
+
+
+class TestTeammateIndex(unittest.TestCase):
+    def generate_team(self):
+        return [
+            Teammate(id='1', name='Alice Appleby'),
+            Teammate(id='2', name='Bob Alston', nickname='al'),
+            Teammate(id='3', name='Carla Lindqvist'),
+            Teammate(id='4', name='Dan Smith'),
+        ]
+
+    def test_ranks_matches(self):
+        index = TeammateIndex(self.generate_team())
+
+        # Exact nickname, then name prefix, then letters in order
+        found = index.search('al')
+        self.assertEqual(['2', '1', '3'], [teammate.id for teammate in found])
+
+    def test_fuzzy_matches(self):
+        index = TeammateIndex(self.generate_team())
+
+        self.assertEqual(['4'], [teammate.id for teammate in index.search('dsmth')])
+        self.assertEqual([], index.search('xyz'))
+
+    def test_narrows_incrementally(self):
+        team = self.generate_team()
+        index = TeammateIndex(team)
+
+        self.assertEqual(4, len(index.search('a')))
+        self.assertEqual(['3'], [teammate.id for teammate in index.search('lind')])
+        # Starting over, rather than narrowing, when the query changes
+        self.assertEqual(['4'], [teammate.id for teammate in index.search('dan')])
+        self.assertEqual(4, len(index.search('')))
+
+    def test_limit(self):
+        index = TeammateIndex(self.generate_team())
+
+        self.assertEqual(2, len(index.search('a', limit=2)))
+
+    def test_score_match(self):
+        bob = search_key(Teammate(name='Bob Alston', nickname='al'))
+        self.assertEqual(100, score_match('al', bob))
+        self.assertEqual(80, score_match('bo', bob))
+        self.assertEqual(60, score_match('als', bob))
+        self.assertEqual(40, score_match('lst', bob))
+        self.assertIsNone(score_match('zz', bob))
+        # Letters closer together score higher
+        self.assertGreater(score_match('bal', bob), score_match('bat', bob))
@@ -0,0 +1,137 @@
+import click
+import requests
+
+import constants
+
+
+class RequestsTransport(object):
+    '''
+    The default transport. HTTP/1.1 over a pooled requests.Session, so
+    concurrent requests each need a connection of their own
+    '''
+
+    def __init__(self, headers):
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=constants.MAX_WORKERS)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(
+        self,
+        method,
+        url,
+        params=None,
+        headers=None,
+        data=None,
+        timeout=None,
+        stream=False,
+    ):
+        return self.session.request(
+            method,
+            url,
+            params=params,
+            headers=headers,
+            data=data,
+            timeout=timeout,
+            stream=stream,
+        )
+
+
+class HTTP2Response(object):
+    '''
+    Wraps an httpx response so it looks like a requests one to SIClient,
+    including raising requests' exceptions
+    '''
+
+    def __init__(self, response, httpx):
+        self._response = response
+        self._httpx = httpx
+        self.status_code = response.status_code
+        self.url = str(response.url)
+
+    def json(self):
+        return self._response.json()
+
+    def iter_content(self, chunk_size=None):
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except self._httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except self._httpx.TransportError as e:
+            raise requests.ConnectionError(str(e))
+
+    def close(self):
+        self._response.close()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(
+                f'{self.status_code} Error for url: {self.url}', response=self
+            )
+
+
+class HTTP2Transport(object):
+    '''
+    Multiplexes every request over a single HTTP/2 connection. Needs the
+    optional httpx[http2] dependency (`pip install .[http2]`)
+
+    HTTP/2 is normally negotiated over TLS. prior_knowledge skips that and
+    speaks HTTP/2 straight away, which plain `http://` servers need (e.g. a
+    local stand-in for SI)
+    '''
+
+    def __init__(self, headers, prior_knowledge=False):
+        import httpx
+
+        self._httpx = httpx
+        self.client = httpx.Client(
+            http1=not prior_knowledge, http2=True, headers=headers
+        )
+
+    def request(
+        self,
+        method,
+        url,
+        params=None,
+        headers=None,
+        data=None,
+        timeout=None,
+        stream=False,
+    ):
+        if timeout:
+            connect_timeout, read_timeout = timeout
+            timeout = self._httpx.Timeout(read_timeout, connect=connect_timeout)
+        request = self.client.build_request(
+            method, url, params=params, headers=headers, content=data, timeout=timeout
+        )
+        try:
+            response = self.client.send(request, stream=stream)
+        except self._httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except self._httpx.TransportError as e:
+            raise requests.ConnectionError(str(e))
+        return HTTP2Response(response, self._httpx)
+
+
+TRANSPORTS = {'http1': RequestsTransport, 'http2': HTTP2Transport}
+
+
+def get_transport(name, headers):
+    '''
+    Builds the named transport, falling back to the default one if it is
+    unknown or its dependencies aren't installed
+    '''
+    name = name or constants.DEFAULT_TRANSPORT
+    if name not in TRANSPORTS:
+        click.echo(f'Unknown transport {name}, using {constants.DEFAULT_TRANSPORT}', err=True)
+        name = constants.DEFAULT_TRANSPORT
+
+    try:
+        return TRANSPORTS[name](headers)
+    except ImportError:
+        click.echo(
+            f'Transport {name} is not installed, using {constants.DEFAULT_TRANSPORT}',
+            err=True,
+        )
+        return TRANSPORTS[constants.DEFAULT_TRANSPORT](headers)
@@ -1,12 +1,13 @@
+import heapq
 import re
 
 
 def match_name_to_teammates(name, team):
     found_teammate = None
     for teammate in team:
-        if name.lower() == teammate.get('nickname', '').lower():
+        if name.lower() == (teammate.nickname or '').lower():
             return teammate
-        elif name.lower() in teammate['name'].lower():
+        elif name.lower() in teammate.name.lower():
             found_teammate = teammate
 
     return found_teammate
@@ -33,16 +34,20 @@ def match_choices_to_teammates(choices, team):
     found_teammates = []
     missing_teammates = []
 
+    if not isinstance(choices, str) and len(choices) == 1:
+        # A single `-t team` works the same as typing `team` at the prompt
+        choices = choices[0]
+
     if isinstance(choices, str):
         if choices.lower() == 'all':
             found_teammates = team
         elif choices.lower() == 'team':
             for teammate in team:
-                if teammate['relationship'] == 'report':
+                if teammate.relationship == 'report':
                     found_teammates.append(teammate)
         elif choices.lower() == 'manager':
             for teammate in team:
-                if teammate['relationship'] == 'manager':
+                if teammate.relationship == 'manager':
                     found_teammates.append(teammate)
                     break
         elif ',' in choices:
@@ -61,3 +66,130 @@ def match_choices_to_teammates(choices, team):
             missing_teammates.append(choice)
 
     return found_teammates, missing_teammates
+
+
+def search_key(teammate):
+    '''
+    What score_match needs about a teammate, worked out once: their lowercase
+    nickname and name, both again with each preceded by a NUL (so `\0query`
+    finds a prefix of either), and the words of their name each preceded by a
+    space (so ` query` finds the start of a word)
+    '''
+    name = teammate.name.lower()
+    haystacks = (teammate.nickname.lower(), name) if teammate.nickname else (name,)
+    return haystacks, '\0' + '\0'.join(haystacks), ' ' + ' '.join(name.split())
+
+
+def score_match(query, key):
+    '''
+    How well a lowercase query matches a teammate's search_key, or None if it
+    doesn't. An exact match beats a prefix, which beats the start of a word,
+    then anywhere, then fuzzy (the letters in order, closer together is better)
+    '''
+    haystacks, starts, words = key
+    if query in haystacks:
+        return 100
+    if '\0' + query in starts:
+        return 80
+    if ' ' + query in words:
+        return 60
+    if query in starts:
+        return 40
+
+    best = None
+    for haystack in haystacks:
+        position = haystack.find(query[0])
+        gaps = 0
+        for char in query[1:]:
+            found = haystack.find(char, position + 1)
+            if found == -1 or position == -1:
+                position = -1
+                break
+            gaps += found - position - 1
+            position = found
+        if position != -1:
+            score = max(1, 20 - gaps)
+            best = score if best is None else max(best, score)
+    return best
+
+
+class TeammateIndex(object):
+    '''
+    Precomputed search keys for fuzzy matching a (possibly large) team as the
+    user types. Alongside each teammate's lowercase names, each character typed
+    maps to a bitmap of the teammates whose names contain it. Any match needs
+    all of the query's characters, so ANDing their bitmaps prunes the team down
+    before anybody is scored. Each new letter also only considers the teammates that
+    matched the query before it, since adding letters can only narrow matches
+    '''
+
+    def __init__(self, team):
+        self.team = team
+        self._keys = [search_key(teammate) for teammate in team]
+        # Last teammate first, so the first teammate is the lowest bit
+        self._joined = [starts for _, starts, _ in reversed(self._keys)]
+        self._chars = {}
+        self._everybody = (1 << len(team)) - 1
+        self._last_query = ''
+        self._last_matches = self._everybody
+
+    def search(self, query, limit=None):
+        query = query.strip().lower()
+        if not query:
+            self._last_query, self._last_matches = '', self._everybody
+            return self.team[:limit] if limit else list(self.team)
+
+        if self._last_query and query.startswith(self._last_query):
+            candidates = self._last_matches
+        else:
+            candidates = self._everybody
+        for char in set(query):
+            candidates &= self._char_bitmap(char)
+
+        scored = []
+        matches = bytearray(b'0') * len(self.team)
+        keys = self._keys
+        # Lowest bit first, so position in the string is the teammate's index
+        bits = bin(candidates)[:1:-1]
+        index = bits.find('1')
+        while index != -1:
+            score = score_match(query, keys[index])
+            if score is not None:
+                scored.append((-score, index))
+                matches[index] = ord('1')
+            index = bits.find('1', index + 1)
+
+        self._last_query = query
+        self._last_matches = int(matches[::-1] or b'0', 2)
+
+        if limit:
+            scored = heapq.nsmallest(limit, scored)
+        else:
+            scored.sort()
+        return [self.team[index] for _, index in scored]
+
+    def _char_bitmap(self, char):
+        # Built the first time a character is typed, rather than for every
+        # character up front
+        if char not in self._chars:
+            self._chars[char] = int(
+                ''.join(['1' if char in joined else '0' for joined in self._joined])
+                or '0',
+                2,
+            )
+        return self._chars[char]
+
+
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def parse_duration(duration):
+    '''
+    Turns durations like `10s`, `500ms` or `2m` into seconds. A bare number is
+    taken as seconds
+    '''
+    match = re.match(r'(\d+(?:\.\d+)?)\s*(ms|s|m|h)?$', duration.strip().lower())
+    if not match:
+        raise ValueError(f'Invalid duration: {duration}')
+
+    return float(match.group(1)) * DURATION_UNITS[match.group(2) or 's']